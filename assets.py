@@ -0,0 +1,208 @@
+import hashlib
+import logging
+import os
+import queue
+import shutil
+import threading
+import time
+import urllib.request
+
+import pygame
+
+try:
+    import numpy  # pygame.surfarray needs NumPy
+except ImportError:
+    numpy = None
+
+# Bundled images, downloads and the cache live next to the game, so it
+# works the same whatever directory it is started from
+ASSET_DIR = os.path.dirname(os.path.abspath(__file__))
+# Processed sprites are cached here, keyed by a hash of the source image
+CACHE_DIR = os.path.join(ASSET_DIR, ".asset_cache")
+# Bump when the preprocessing below changes so old cache entries are ignored
+CACHE_VERSION = 1
+
+# Pixels with r, g and b all above this are treated as background
+LIGHT_THRESHOLD = 200
+
+# Seconds a single download may stall before it is given up
+DOWNLOAD_TIMEOUT = 5
+
+log = logging.getLogger(__name__)
+
+# ===========================
+# Preprocessing
+# ===========================
+def remove_light_background(img, threshold=LIGHT_THRESHOLD):
+    # Make near-white pixels fully transparent. img must have per-pixel alpha.
+    if numpy is None:
+        # Slow fallback without NumPy
+        for x in range(img.get_width()):
+            for y in range(img.get_height()):
+                r, g, b, a = img.get_at((x, y))
+                if r > threshold and g > threshold and b > threshold:
+                    img.set_at((x, y), (r, g, b, 0))
+        return
+
+    rgb = pygame.surfarray.pixels3d(img)
+    alpha = pygame.surfarray.pixels_alpha(img)
+    light = (rgb[:, :, 0] > threshold) & (rgb[:, :, 1] > threshold) & (rgb[:, :, 2] > threshold)
+    alpha[light] = 0
+    # Release the pixel views so the surface is unlocked again
+    del rgb, alpha
+
+def cache_key(filename, size):
+    digest = hashlib.sha1()
+    with open(filename, "rb") as f:
+        digest.update(f.read())
+    digest.update(f"{size[0]}x{size[1]}:{LIGHT_THRESHOLD}:{CACHE_VERSION}".encode())
+    return digest.hexdigest()
+
+# ===========================
+# Loading
+# ===========================
+def load_car_sprite(filename, size=(50, 100)):
+    # Load a car sprite with its light background removed, scaled to size.
+    # The finished sprite is written to CACHE_DIR so later launches only
+    # need a single image load.
+    name = os.path.splitext(os.path.basename(filename))[0]
+    cache_path = os.path.join(CACHE_DIR, f"{name}-{cache_key(filename, size)}.png")
+
+    if os.path.exists(cache_path):
+        try:
+            return pygame.image.load(cache_path).convert_alpha()
+        except pygame.error:
+            pass  # Corrupt cache entry, rebuild it below
+
+    img = pygame.image.load(filename).convert_alpha()
+    remove_light_background(img)
+    img = pygame.transform.scale(img, size)
+
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        pygame.image.save(img, cache_path)
+    except (OSError, pygame.error):
+        pass  # Read-only install, just skip the cache
+
+    return img
+
+def load_background(filename, size):
+    img = pygame.image.load(filename).convert()
+    # Scale background to full screen to avoid gaps
+    return pygame.transform.scale(img, size)
+
+# ===========================
+# Placeholders
+# ===========================
+def make_road_placeholder(size):
+    # Custom road background, used until background.png is available
+    width, height = size
+    img = pygame.Surface(size)
+    img.fill((40, 40, 40))  # Dark gray road
+    # Draw road markings
+    pygame.draw.rect(img, (255, 255, 255), (50, 0, 10, height))  # Left line
+    pygame.draw.rect(img, (255, 255, 255), (width - 60, 0, 10, height))  # Right line
+    # Center dashed line
+    for i in range(0, height, 60):
+        pygame.draw.rect(img, (255, 200, 0), (width // 2 - 5, i, 10, 40))
+    return img
+
+def make_car_placeholder(size, color):
+    # Simple top-down car: body, windshields and wheels
+    width, height = size
+    img = pygame.Surface(size, pygame.SRCALPHA)
+    for wheel_y in (height * 0.15, height * 0.7):
+        pygame.draw.rect(img, (20, 20, 20), (0, wheel_y, width, height * 0.15), border_radius=3)
+    pygame.draw.rect(img, color, (width * 0.1, 0, width * 0.8, height), border_radius=10)
+    glass = (150, 200, 230)
+    pygame.draw.rect(img, glass, (width * 0.2, height * 0.2, width * 0.6, height * 0.15), border_radius=4)
+    pygame.draw.rect(img, glass, (width * 0.2, height * 0.7, width * 0.6, height * 0.1), border_radius=4)
+    return img
+
+# ===========================
+# Asset manager
+# ===========================
+def download(url, filename, timeout=DOWNLOAD_TIMEOUT):
+    # Write to a temporary name first so a half-finished download is never
+    # mistaken for a bundled asset on the next launch
+    partial = filename + ".part"
+    with urllib.request.urlopen(url, timeout=timeout) as response, open(partial, "wb") as f:
+        shutil.copyfileobj(response, f)
+    os.replace(partial, filename)
+
+class AssetManager:
+    # Offline-first image loading. Bundled files are loaded right away;
+    # missing ones get a procedural placeholder and are fetched on a
+    # background thread. poll() (called once per frame from the main
+    # thread, which owns pygame surfaces) swaps finished downloads in.
+
+    def __init__(self):
+        self.images = {}
+        self.specs = {}
+        self.ready = queue.Queue()
+        self.pending = []
+        self.started = time.perf_counter()
+        self.first_frame_time = None
+
+    def __getitem__(self, name):
+        return self.images[name]
+
+    def add_image(self, name, filename, url, loader, size, placeholder):
+        # A relative filename is looked up in ASSET_DIR
+        filename = os.path.join(ASSET_DIR, filename)
+        self.specs[name] = (filename, url, loader, size)
+        if os.path.exists(filename):
+            try:
+                self.images[name] = loader(filename, size)
+                return
+            except pygame.error as e:
+                log.warning("Could not load %s: %s", filename, e)
+
+        self.images[name] = placeholder(size)
+        self.pending.append(name)
+
+    def start(self):
+        # Fetch every missing asset without blocking the first frame
+        if not self.pending:
+            return
+        thread = threading.Thread(target=self._fetch, args=(list(self.pending),), daemon=True)
+        thread.start()
+
+    def _fetch(self, names):
+        for name in names:
+            filename, url, loader, size = self.specs[name]
+            try:
+                download(url, filename)
+            except (OSError, ValueError) as e:
+                log.warning("Download of %s failed, keeping placeholder: %s", filename, e)
+                self.ready.put((name, False))
+                continue
+            self.ready.put((name, True))
+
+    def poll(self):
+        # Returns the names of assets that were replaced this frame
+        replaced = []
+        while True:
+            try:
+                name, downloaded = self.ready.get_nowait()
+            except queue.Empty:
+                break
+            # Done either way; a failed asset keeps its placeholder
+            self.pending.remove(name)
+            if not downloaded:
+                continue
+            filename, url, loader, size = self.specs[name]
+            try:
+                self.images[name] = loader(filename, size)
+            except pygame.error as e:
+                log.warning("Downloaded %s is unusable, keeping placeholder: %s", filename, e)
+                continue
+            replaced.append(name)
+        return replaced
+
+    def frame_presented(self):
+        # Call after each display flip; records time-to-first-frame once
+        if self.first_frame_time is None:
+            self.first_frame_time = time.perf_counter() - self.started
+            log.info("First frame after %.1f ms (%d assets still downloading)",
+                     self.first_frame_time * 1000, len(self.pending))
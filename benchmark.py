@@ -0,0 +1,244 @@
+import os
+
+# Render offscreen; must be set before pygame creates the window
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+# Keep stdout clean for the JSON report
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import argparse
+import gc
+import json
+import platform
+import random
+import time
+import tracemalloc
+
+import pygame
+
+import game_mobil_balap as game
+from entity_engine import BACKENDS, create_state
+from game_state import (
+    Inputs, WIDTH, HEIGHT, RED, BLUE,
+    MENU, PLAYING, GAME_OVER, PAUSED, WINNER,
+)
+from profiler import percentile
+from quality import QUALITY_TIERS, find_tier
+
+# ===========================
+# Scripted input
+# ===========================
+def scripted_input(frame):
+    # Weave across the road: left, straight, right, straight, 30 frames each
+    phase = (frame // 30) % 4
+    return Inputs(left=phase == 0, right=phase == 2)
+
+# ===========================
+# Scenarios
+# ===========================
+# Each scenario has a setup(state) run once and an optional per-frame hook
+# run before the tick, both working on the global random and state.rng so
+# every run replays the same frames.
+
+def keep_playing(state, frame=None):
+    # Benchmarks measure one screen, so the game never ends mid-run
+    state.player_lives = 10 ** 6
+    state.mode = PLAYING
+
+def setup_menu(state):
+    state.mode = MENU
+
+def setup_playing(state):
+    game.start_game()
+    keep_playing(state)
+
+def setup_max_enemies(state):
+    setup_playing(state)
+    state.enemy_cap = 30
+
+def fill_enemies(state, frame):
+    # Shielded, so collisions explode enemies instead of ending the run
+    state.shield_active = True
+    state.shield_timer = 5
+    # Top up to the cap every frame instead of waiting for random spawns
+    for _ in range(state.enemy_cap + state.level - len(state.enemies)):
+        state.add_enemy()
+
+def setup_explosions(state):
+    setup_playing(state)
+
+def explode(state, frame):
+    # Four explosions a frame keeps roughly 1800 particles alive
+    for i in range(4):
+        x = state.effects_rng.randint(0, WIDTH)
+        y = state.effects_rng.randint(0, HEIGHT)
+        state.create_explosion(x, y, RED if i % 2 else BLUE)
+
+def setup_paused(state):
+    setup_playing(state)
+    state.mode = PAUSED
+
+def setup_game_over(state):
+    setup_playing(state)
+    state.score = 120
+    state.finish(GAME_OVER)
+
+def setup_winner(state):
+    setup_playing(state)
+    state.score = 500
+    state.level = 5
+    state.finish(WINNER)
+
+def fill_confetti(state, frame):
+    # The normal spawn rate never reaches the cap, pieces fall off first;
+    # keep the screen full so the cap is what gets measured
+    while len(game.confetti_particles) < game.confetti_cap:
+        game.confetti_particles.append(game.confetti_pool.acquire(
+            random.randint(0, WIDTH), random.randint(-10, HEIGHT)))
+
+def setup_confetti_storm(state):
+    setup_winner(state)
+    game.confetti_cap = 2000
+
+SCENARIOS = {
+    "menu": (setup_menu, None, 0),
+    "playing": (setup_playing, keep_playing, 0),
+    "playing_max_enemies": (setup_max_enemies, fill_enemies, 0),
+    "playing_explosions": (setup_explosions, explode, 0),
+    "paused": (setup_paused, None, 0),
+    "game_over": (setup_game_over, None, 0),
+    "winner": (setup_winner, None, 0),
+    # A full 200 piece confetti shower
+    "winner_confetti": (setup_winner, fill_confetti, 0),
+    # Ten times the normal confetti cap
+    "winner_confetti_storm": (setup_confetti_storm, fill_confetti, 0),
+}
+
+def prepare(name, backend, seed, tier=QUALITY_TIERS[0]):
+    # Fresh state and renderer globals so every scenario starts the same way
+    random.seed(seed)
+    state = create_state(backend, seed=seed)
+    game.state = state
+    game.menu_animation_time = 0
+    game.winner_animation_time = 0
+    game.apply_quality(tier, state)
+    for car in game.menu_cars:
+        car['x'] = random.randint(60, WIDTH - 60)
+        car['y'] = random.randint(-200, HEIGHT)
+        car['speed'] = random.randint(2, 5)
+
+    setup, hook, prewarm = SCENARIOS[name]
+    setup(state)
+    for frame in range(prewarm):
+        game.animate(state, state.dt)
+    return state, hook
+
+def run_frames(state, hook, frames, times=None):
+    dt = state.dt
+    for frame in range(frames):
+        start = time.perf_counter()
+        if hook is not None:
+            hook(state, frame)
+        state.step(scripted_input(frame))
+        game.animate(state, dt)
+        game.draw_frame(state)
+        pygame.display.update()
+        if times is not None:
+            times.append(time.perf_counter() - start)
+
+# ===========================
+# Measurement
+# ===========================
+def measure(name, backend, seed, frames, warmup, allocations, tier=QUALITY_TIERS[0]):
+    state, hook = prepare(name, backend, seed, tier)
+    run_frames(state, hook, warmup)
+
+    times = []
+    gc_before = sum(s["collections"] for s in gc.get_stats())
+    surfaces_before = game.surface_allocations()
+    run_frames(state, hook, frames, times)
+    surfaces = game.surface_allocations() - surfaces_before
+    gc_after = sum(s["collections"] for s in gc.get_stats())
+
+    times.sort()
+    total = sum(times)
+    result = {
+        "frames": frames,
+        "mean_ms": total / frames * 1000,
+        "p50_ms": percentile(times, 50) * 1000,
+        "p95_ms": percentile(times, 95) * 1000,
+        "p99_ms": percentile(times, 99) * 1000,
+        "max_ms": times[-1] * 1000,
+        "fps": frames / total if total else 0.0,
+        "gc_collections": gc_after - gc_before,
+        "surfaces_per_frame": surfaces / frames,
+        "mode": state.mode,
+    }
+
+    if allocations:
+        # Second, identical pass under tracemalloc; it slows Python down a
+        # lot, so its timings are not mixed into the ones above
+        state, hook = prepare(name, backend, seed, tier)
+        run_frames(state, hook, warmup)
+        tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+        run_frames(state, hook, frames)
+        after = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        diff = after.compare_to(before, "filename")
+        result["alloc_peak_kib"] = peak / 1024
+        result["alloc_net_kib"] = sum(stat.size_diff for stat in diff) / 1024
+        result["alloc_net_blocks"] = sum(stat.count_diff for stat in diff)
+
+    return result
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Deterministic frame benchmark")
+    parser.add_argument("--backend", choices=sorted(BACKENDS), default="objects")
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS),
+                        help="scenario to run, may be repeated (default: all)")
+    parser.add_argument("--frames", type=int, default=600,
+                        help="measured frames per scenario (default: %(default)s)")
+    parser.add_argument("--warmup", type=int, default=60,
+                        help="unmeasured frames before each run (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--quality", choices=[tier.name for tier in QUALITY_TIERS], default="high",
+                        help="effect quality tier to render at (default: %(default)s)")
+    parser.add_argument("--no-alloc", action="store_true",
+                        help="skip the tracemalloc allocation pass")
+    parser.add_argument("--output", help="write JSON here instead of stdout")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    names = args.scenario or list(SCENARIOS)
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "pygame": pygame.version.ver,
+            "video_driver": pygame.display.get_driver(),
+            "backend": args.backend,
+            "seed": args.seed,
+            "frames": args.frames,
+            "warmup": args.warmup,
+            "quality": args.quality,
+        },
+        "scenarios": {},
+    }
+    tier = QUALITY_TIERS[find_tier(args.quality)]
+    for name in names:
+        report["scenarios"][name] = measure(name, args.backend, args.seed, args.frames,
+                                            args.warmup, not args.no_alloc, tier)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+import json
+import logging
+import os
+import queue
+import struct
+import sys
+import threading
+import zlib
+from time import perf_counter
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+FORMATS = ("raw", "png")
+# Frames that may wait for the writer before new ones are dropped
+RING_SIZE = 8
+# zlib level for PNG frames; 1 keeps the writer ahead of 60 FPS
+PNG_LEVEL = 1
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+log = logging.getLogger(__name__)
+
+# ===========================
+# Encoding
+# ===========================
+def png_chunk(tag, data):
+    return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data))
+
+def encode_png(rgb, level=PNG_LEVEL):
+    # 8-bit RGB PNG with the "up" filter on every row. zlib releases the
+    # GIL while it compresses, so this does not hold up the frame loop.
+    height, width, _ = rgb.shape
+    flat = rgb.reshape(height, -1)
+    rows = np.empty((height, 1 + flat.shape[1]), np.uint8)
+    rows[:, 0] = 2
+    rows[0, 1:] = flat[0]
+    np.subtract(flat[1:], flat[:-1], out=rows[1:, 1:])
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    return (PNG_SIGNATURE + png_chunk(b"IHDR", header)
+            + png_chunk(b"IDAT", zlib.compress(rows, level)) + png_chunk(b"IEND", b""))
+
+def channel_bytes(surface):
+    # Byte offsets of red, green and blue inside one pixel
+    size = surface.get_bytesize()
+    if size not in (3, 4):
+        raise ValueError("Frame capture needs a 24 or 32 bit display surface")
+    offsets = [shift // 8 for shift in surface.get_shifts()[:3]]
+    if sys.byteorder == "big":
+        offsets = [size - 1 - offset for offset in offsets]
+    return offsets
+
+def pixel_format(channels, size):
+    # ffmpeg -pix_fmt of the surface's own byte layout, e.g. "bgr0"
+    layout = ["0"] * size
+    for name, offset in zip("rgb", channels):
+        layout[offset] = name
+    return "".join(layout) if size == 4 else "".join(layout) + "24"
+
+# ===========================
+# Frame capture
+# ===========================
+class FrameCapture:
+    # Copies each finished frame out of the display surface into a ring of
+    # preallocated buffers and lets a writer thread convert and save it.
+    # The frame loop only pays for one memcpy of the raw pixels, read
+    # through the surface's buffer view; when every buffer is still waiting
+    # for the writer the frame is dropped and counted instead of stalling.
+    #   raw: all frames in one file, in the surface's own pixel layout so
+    #        the writer never converts them, plus a .json sidecar for ffmpeg
+    #   png: a directory with frame_000000.png, ... (gaps are dropped frames)
+
+    def __init__(self, surface, path, fmt="raw", fps=60, ring_size=RING_SIZE, png_level=PNG_LEVEL):
+        if np is None:
+            raise RuntimeError("Frame capture needs NumPy: pip install numpy")
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown capture format: {fmt}")
+
+        self.surface = surface
+        self.path = path
+        self.fmt = fmt
+        self.fps = fps
+        self.png_level = png_level
+        self.width, self.height = surface.get_size()
+        self.pitch = surface.get_pitch()
+        self.bytesize = surface.get_bytesize()
+        self.channels = channel_bytes(surface)
+        self.pix_fmt = pixel_format(self.channels, self.bytesize)
+
+        self.buffers = [np.empty(self.height * self.pitch, np.uint8) for _ in range(ring_size)]
+        self.free = queue.SimpleQueue()
+        for slot in range(ring_size):
+            self.free.put(slot)
+        self.filled = queue.SimpleQueue()
+
+        self.captured = 0
+        self.dropped = 0
+        self.written = 0
+        self.capture_time = 0.0
+        self.capture_max = 0.0
+        self.write_time = 0.0
+
+        if fmt == "raw":
+            self.file = open(path, "wb")
+        else:
+            os.makedirs(path, exist_ok=True)
+            self.file = None
+        self.thread = threading.Thread(target=self._write, name="frame-capture", daemon=True)
+        self.thread.start()
+
+    def capture(self):
+        # Call once the frame is drawn; returns False when it was dropped
+        start = perf_counter()
+        try:
+            slot = self.free.get_nowait()
+        except queue.Empty:
+            self.dropped += 1
+            return False
+
+        # The view locks the surface only until this statement is done
+        np.copyto(self.buffers[slot], np.frombuffer(self.surface.get_view("0"), np.uint8))
+        self.filled.put((slot, self.captured + self.dropped))
+        self.captured += 1
+
+        elapsed = perf_counter() - start
+        self.capture_time += elapsed
+        self.capture_max = max(self.capture_max, elapsed)
+        return True
+
+    def close(self):
+        # Waits for the writer, then logs and returns the stats
+        self.filled.put(None)
+        self.thread.join()
+        if self.file is not None:
+            self.file.close()
+            with open(self.path + ".json", "w") as f:
+                json.dump({"width": self.width, "height": self.height, "pix_fmt": self.pix_fmt,
+                           "fps": self.fps, "frames": self.written}, f)
+
+        stats = self.stats()
+        log.info("Captured %d frames to %s, %d dropped (%.1f%%), %.3f ms per frame in the "
+                 "loop (max %.3f), %.3f ms per frame in the writer",
+                 stats["written"], self.path, stats["dropped"], stats["drop_rate"] * 100,
+                 stats["capture_ms"], stats["capture_max_ms"], stats["write_ms"])
+        return stats
+
+    def stats(self):
+        total = self.captured + self.dropped
+        return {
+            "captured": self.captured,
+            "dropped": self.dropped,
+            "written": self.written,
+            "drop_rate": self.dropped / total if total else 0.0,
+            "capture_ms": self.capture_time / self.captured * 1000 if self.captured else 0.0,
+            "capture_max_ms": self.capture_max * 1000,
+            "write_ms": self.write_time / self.written * 1000 if self.written else 0.0,
+        }
+
+    def pixels(self, slot):
+        # One buffer as (height, width, bytes per pixel), without row padding
+        pixels = self.buffers[slot].reshape(self.height, self.pitch)
+        return pixels[:, :self.width * self.bytesize].reshape(self.height, self.width, self.bytesize)
+
+    def rgb(self, slot):
+        # One buffer converted to a (height, width, 3) RGB array
+        pixels = self.pixels(slot)
+        rgb = np.empty((self.height, self.width, 3), np.uint8)
+        for i, offset in enumerate(self.channels):
+            rgb[:, :, i] = pixels[:, :, offset]
+        return rgb
+
+    def _write(self):
+        while True:
+            item = self.filled.get()
+            if item is None:
+                break
+            slot, number = item
+            start = perf_counter()
+            try:
+                if self.file is not None:
+                    self.file.write(np.ascontiguousarray(self.pixels(slot)))
+                    self.free.put(slot)
+                else:
+                    rgb = self.rgb(slot)
+                    self.free.put(slot)
+                    with open(os.path.join(self.path, f"frame_{number:06d}.png"), "wb") as f:
+                        f.write(encode_png(rgb, self.png_level))
+            except OSError:
+                # Disk full or gone; later frames are counted as dropped
+                log.exception("Frame capture stopped writing to %s", self.path)
+                break
+            self.written += 1
+            self.write_time += perf_counter() - start
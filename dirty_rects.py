@@ -0,0 +1,46 @@
+import pygame
+
+# ===========================
+# Dirty rectangle tracking
+# ===========================
+class DirtyRectTracker:
+    # Remembers what was drawn last frame so only those areas are repainted
+    # and sent to pygame.display.update(rects). A full repaint is forced on
+    # the first frame and whenever invalidate() is called (screen change).
+
+    def __init__(self, screen_rect):
+        self.screen_rect = pygame.Rect(screen_rect)
+        self.previous = []
+        self.current = []
+        self.full = True
+        self.full_updates = 0
+        self.partial_updates = 0
+
+    def invalidate(self):
+        self.full = True
+
+    def restore(self, surface, background):
+        # Paint the background back over everything drawn last frame
+        for rect in self.previous:
+            surface.blit(background, rect, rect)
+
+    def add(self, rect):
+        if rect.width and rect.height:
+            self.current.append(rect)
+
+    def add_all(self, rects):
+        for rect in rects:
+            self.add(rect)
+
+    def flush(self):
+        # Returns the rects to pass to display.update, or None for a full flip
+        if self.full:
+            rects = None
+            self.full = False
+            self.full_updates += 1
+        else:
+            rects = [rect.clip(self.screen_rect) for rect in self.previous + self.current]
+            self.partial_updates += 1
+
+        self.previous, self.current = self.current, []
+        return rects
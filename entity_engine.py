@@ -0,0 +1,239 @@
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional, the object backend still works
+    np = None
+
+from game_state import (
+    GameState, HEIGHT, PLAYER_WIDTH, PLAYER_HEIGHT, ENEMY_WIDTH, ENEMY_HEIGHT,
+    TICK_RATE, REFERENCE_FPS, PARTICLE_LIFE, POWERUP_SIZE,
+    WHITE, BLACK, RED, GREEN, YELLOW, BLUE,
+)
+
+# Particle colors are stored as an index into this palette
+PALETTE = [RED, BLUE, YELLOW, GREEN, WHITE, BLACK]
+PALETTE_INDEX = {color: i for i, color in enumerate(PALETTE)}
+
+# ===========================
+# Struct-of-arrays storage
+# ===========================
+class EntityArrays:
+    # Preallocated NumPy columns for one kind of entity. Live entities are
+    # always packed in [0, count); removal is done in bulk by compact().
+
+    def __init__(self, fields, capacity=64):
+        self.fields = fields
+        self.capacity = capacity
+        self.count = 0
+        self.columns = {name: np.zeros(capacity, dtype) for name, dtype in fields.items()}
+
+    def __len__(self):
+        return self.count
+
+    def __getattr__(self, name):
+        # Live view of a column, e.g. arrays.y -> y[:count]
+        try:
+            column = self.__dict__["columns"][name]
+        except KeyError:
+            raise AttributeError(name) from None
+        return column[:self.count]
+
+    def clear(self):
+        self.count = 0
+
+    def reserve(self, extra):
+        needed = self.count + extra
+        if needed <= self.capacity:
+            return
+        capacity = self.capacity
+        while capacity < needed:
+            capacity *= 2
+        for name, column in self.columns.items():
+            grown = np.zeros(capacity, column.dtype)
+            grown[:self.count] = column[:self.count]
+            self.columns[name] = grown
+        self.capacity = capacity
+
+    def append(self, **values):
+        self.reserve(1)
+        i = self.count
+        for name, value in values.items():
+            self.columns[name][i] = value
+        self.count += 1
+
+    def extend(self, n, **values):
+        # values may be scalars (broadcast) or arrays of length n
+        self.reserve(n)
+        start, end = self.count, self.count + n
+        for name, value in values.items():
+            self.columns[name][start:end] = value
+        self.count = end
+
+    def compact(self, keep):
+        # Drop every entity whose keep[i] is False in one pass per column
+        kept = int(np.count_nonzero(keep))
+        if kept == self.count:
+            return
+        for column in self.columns.values():
+            column[:kept] = column[:self.count][keep]
+        self.count = kept
+
+def overlaps(x, y, w, h, rx, ry, rw, rh):
+    # Vectorized pygame.Rect.colliderect; Rect truncates floats toward zero
+    x = x.astype(np.int64)
+    y = y.astype(np.int64)
+    rx, ry = int(rx), int(ry)
+    return (x < rx + rw) & (x + w > rx) & (y < ry + rh) & (y + h > ry)
+
+# ===========================
+# NumPy game state
+# ===========================
+class ArrayGameState(GameState):
+    # Same rules as GameState, but enemies, power-ups and particles live in
+    # EntityArrays and are updated, culled and collided as whole arrays.
+    # Enemy and power-up spawns draw from the same random.Random sequence as
+    # the object backend, so a seeded game plays out identically. The
+    # SpatialHash of the object backend is not used: collision and spawn
+    # checks are single array operations here.
+
+    def __init__(self, seed=None, tick_rate=TICK_RATE, difficulty=None):
+        if np is None:
+            raise RuntimeError("The numpy backend needs NumPy: pip install numpy")
+        self.np_rng = np.random.default_rng(seed)
+        super().__init__(seed, tick_rate, difficulty)
+
+    def release_entities(self):
+        pass  # Arrays are reused in place, nothing to pool
+
+    def make_containers(self):
+        enemies = EntityArrays({
+            "x": np.float64, "y": np.float64, "prev_y": np.float64, "speed": np.float64,
+        })
+        powerups = EntityArrays({
+            "x": np.float64, "y": np.float64, "prev_y": np.float64, "type": np.int8,
+        }, capacity=8)
+        particles = EntityArrays({
+            "x": np.float64, "y": np.float64,
+            "prev_x": np.float64, "prev_y": np.float64,
+            "vx": np.float64, "vy": np.float64,
+            "life": np.float64, "color": np.int8,
+        }, capacity=256)
+        return enemies, powerups, particles
+
+    def insert_enemy(self, x, y, speed):
+        self.enemies.append(x=x, y=y, prev_y=y, speed=speed)
+
+    def insert_powerup(self, x, y, powerup_type):
+        self.powerups.append(x=x, y=y, prev_y=y, type=powerup_type)
+
+    def spawn_area_free(self, x, y, w, h):
+        # One array test against all enemies and power-ups; no grid needed
+        enemies, powerups = self.enemies, self.powerups
+        if enemies.count and overlaps(enemies.x, enemies.y, ENEMY_WIDTH, ENEMY_HEIGHT, x, y, w, h).any():
+            return False
+        if powerups.count and overlaps(powerups.x, powerups.y, POWERUP_SIZE, POWERUP_SIZE, x, y, w, h).any():
+            return False
+        return True
+
+    def create_explosion(self, x, y, color):
+        n = self.explosion_particles
+        self.particles.extend(
+            n, x=x, y=y, prev_x=x, prev_y=y,
+            vx=self.np_rng.integers(-5, 6, n) * REFERENCE_FPS,
+            vy=self.np_rng.integers(-5, 6, n) * REFERENCE_FPS,
+            life=PARTICLE_LIFE, color=PALETTE_INDEX[color],
+        )
+
+    # ---------------------------
+    # Read access for renderers
+    # ---------------------------
+    def enemy_positions(self, alpha=1.0):
+        e = self.enemies
+        y = e.prev_y + (e.y - e.prev_y) * alpha
+        return list(zip(e.x.tolist(), y.tolist()))
+
+    def powerup_items(self, alpha=1.0):
+        p = self.powerups
+        y = p.prev_y + (p.y - p.prev_y) * alpha
+        return list(zip(p.x.tolist(), y.tolist(), p.type.tolist()))
+
+    def particle_items(self, alpha=1.0):
+        p = self.particles
+        x = p.prev_x + (p.x - p.prev_x) * alpha
+        y = p.prev_y + (p.y - p.prev_y) * alpha
+        return [(px, py, PALETTE[c]) for px, py, c in zip(x.tolist(), y.tolist(), p.color.tolist())]
+
+    def entity_rows(self):
+        e, p, q = self.enemies, self.powerups, self.particles
+        return (list(zip(e.x.tolist(), e.prev_y.tolist(), e.y.tolist())),
+                list(zip(p.x.tolist(), p.prev_y.tolist(), p.y.tolist(), p.type.tolist())),
+                [(prev_x, x, prev_y, y, PALETTE[c]) for prev_x, x, prev_y, y, c in zip(
+                    q.prev_x.tolist(), q.x.tolist(), q.prev_y.tolist(), q.y.tolist(), q.color.tolist())])
+
+    # ---------------------------
+    # Simulation step
+    # ---------------------------
+    def update_entities(self):
+        dt = self.dt
+
+        enemies = self.enemies
+        enemies.prev_y[:] = enemies.y
+        if self.slow_active:
+            enemies.y[:] += enemies.speed * 0.5 * dt
+        else:
+            enemies.y[:] += enemies.speed * dt
+        passed = enemies.y > HEIGHT
+        passed_count = int(np.count_nonzero(passed))
+        if passed_count:
+            enemies.compact(~passed)
+            for _ in range(passed_count):
+                self.enemy_passed()
+
+        powerups = self.powerups
+        if powerups.count:
+            powerups.prev_y[:] = powerups.y
+            powerups.y[:] += 2 * REFERENCE_FPS * dt
+            powerups.compact(powerups.y <= HEIGHT)
+
+        particles = self.particles
+        if particles.count:
+            particles.prev_x[:] = particles.x
+            particles.prev_y[:] = particles.y
+            particles.x[:] += particles.vx * dt
+            particles.y[:] += particles.vy * dt
+            particles.life[:] -= dt
+            particles.compact(particles.life > 0)
+
+    def check_collisions(self):
+        px, py = self.player_x, self.player_y
+
+        enemies = self.enemies
+        if enemies.count:
+            hit = overlaps(enemies.x, enemies.y, ENEMY_WIDTH, ENEMY_HEIGHT,
+                           px, py, PLAYER_WIDTH, PLAYER_HEIGHT)
+            if hit.any():
+                hits = list(zip(enemies.x[hit].tolist(), enemies.y[hit].tolist()))
+                enemies.compact(~hit)
+                for x, y in hits:
+                    self.hit_enemy(x, y)
+
+        powerups = self.powerups
+        if powerups.count:
+            hit = overlaps(powerups.x, powerups.y, POWERUP_SIZE, POWERUP_SIZE,
+                           px, py, PLAYER_WIDTH, PLAYER_HEIGHT)
+            if hit.any():
+                hits = list(zip(powerups.x[hit].tolist(), powerups.y[hit].tolist(),
+                                powerups.type[hit].tolist()))
+                powerups.compact(~hit)
+                for x, y, powerup_type in hits:
+                    self.collect_powerup(x, y, powerup_type)
+
+# ===========================
+# Backend selection
+# ===========================
+BACKENDS = {
+    "objects": GameState,
+    "numpy": ArrayGameState,
+}
+
+def create_state(backend="objects", seed=None, tick_rate=TICK_RATE, difficulty=None):
+    return BACKENDS[backend](seed, tick_rate, difficulty)
@@ -1,97 +1,74 @@
 import pygame
+import argparse
+import logging
 import random
 import sys
-import urllib.request
-import os
 import math
+import sqlite3
+from functools import partial
+from time import perf_counter
 
-# ===========================
-# Download gambar
-# ===========================
-def download_image(url, filename):
-    if not os.path.exists(filename):
-        urllib.request.urlretrieve(url, filename)
+from game_state import (
+    GameState, Inputs, WIDTH, HEIGHT, PLAYER_WIDTH, PLAYER_HEIGHT,
+    TICK_RATE, REFERENCE_FPS,
+    ENEMY_WIDTH, ENEMY_HEIGHT,
+    MENU, PLAYING, GAME_OVER, PAUSED, WINNER,
+    WHITE, BLACK, RED, GREEN, YELLOW, BLUE,
+    POWERUP_SHIELD, POWERUP_SLOW, POWERUP_COLORS,
+    predict_player_position,
+)
+from entity_engine import BACKENDS, create_state
+from assets import (
+    AssetManager, load_background, load_car_sprite,
+    make_car_placeholder, make_road_placeholder,
+)
+from render_cache import FrameAtlas, LayerCache, SurfaceCache, TextCache
+from render_queue import (
+    RenderQueue, LAYER_ENEMIES, LAYER_POWERUPS, LAYER_PARTICLES, LAYER_SHIELD, LAYER_PLAYER,
+    LAYER_HUD,
+)
+from capture import FORMATS as CAPTURE_FORMATS, FrameCapture
+from dirty_rects import DirtyRectTracker
+from history import HISTORY_FILE, RunHistory
+from latency import LatencyTracker
+from pipeline import SimulationThread
+from pooling import ObjectPool
+from profiler import NULL_PROFILER, PHASES, FrameProfiler
+from quality import QUALITY_TIERS, QualityGovernor, find_tier
+from replay import Recorder
 
-download_image("https://i.ibb.co/vs3fG0F/road.png", "background.png")
-download_image("https://i.ibb.co/0F7ZVYQ/player_car.png", "player_car.png")
-download_image("https://i.ibb.co/1zM5P6N/enemy_car.png", "enemy_car.png")
+# Created first so time-to-first-frame covers the whole startup
+assets = AssetManager()
 
 # ===========================
 # Init pygame
 # ===========================
 pygame.init()
-WIDTH, HEIGHT = 480, 640
 screen = pygame.display.set_mode((WIDTH, HEIGHT))
 pygame.display.set_caption("Game Mobil Balap 2D - Enhanced")
 
 clock = pygame.time.Clock()
+# Default render frame cap; the simulation runs at its own fixed tick rate
 FPS = 60
+# Longest frame fed to the simulation, so a stall never causes a tick storm
+MAX_FRAME_TIME = 0.25
 
 # ===========================
 # Load gambar
 # ===========================
-try:
-    background_img = pygame.image.load("background.png").convert()
-    # Scale background to full screen to avoid gaps
-    background_img = pygame.transform.scale(background_img, (WIDTH, HEIGHT))
-except:
-    # Fallback: create custom road background
-    background_img = pygame.Surface((WIDTH, HEIGHT))
-    background_img.fill((40, 40, 40))  # Dark gray road
-    # Draw road markings
-    pygame.draw.rect(background_img, (255, 255, 255), (50, 0, 10, HEIGHT))  # Left line
-    pygame.draw.rect(background_img, (255, 255, 255), (WIDTH-60, 0, 10, HEIGHT))  # Right line
-    # Center dashed line
-    for i in range(0, HEIGHT, 60):
-        pygame.draw.rect(background_img, (255, 200, 0), (WIDTH//2 - 5, i, 10, 40))
-
-player_img_original = pygame.image.load("player_car.png").convert_alpha()
-enemy_img_original = pygame.image.load("enemy_car.png").convert_alpha()
-
-# Remove white/light backgrounds more aggressively
-# Set colorkey for various shades of white/gray that might appear
-for img in [player_img_original, enemy_img_original]:
-    # Set multiple color keys for better transparency
-    img.set_colorkey((200, 200, 200))
-    img.set_colorkey((255, 255, 255))
-    img.set_colorkey((240, 240, 240))
-    img.set_colorkey((220, 220, 220))
-    img.set_colorkey((250, 250, 250))
-    
-    # Convert pixels close to white to fully transparent
-    for x in range(img.get_width()):
-        for y in range(img.get_height()):
-            r, g, b, a = img.get_at((x, y))
-            # If pixel is very light (close to white), make it transparent
-            if r > 200 and g > 200 and b > 200:
-                img.set_at((x, y), (r, g, b, 0))
-
-player_img = pygame.transform.scale(player_img_original, (50, 100))
-enemy_img = pygame.transform.scale(enemy_img_original, (50, 100))
-
-player_width, player_height = player_img.get_size()
-enemy_width, enemy_height = enemy_img.get_size()
-
-# ===========================
-# Game States
-# ===========================
-MENU = 0
-PLAYING = 1
-GAME_OVER = 2
-PAUSED = 3
-WINNER = 4
-
-game_state = MENU
-
-# ===========================
-# Warna
-# ===========================
-WHITE = (255, 255, 255)
-BLACK = (0, 0, 0)
-RED = (255, 0, 0)
-GREEN = (0, 255, 0)
-YELLOW = (255, 255, 0)
-BLUE = (0, 150, 255)
+# Bundled files are used when present. Missing ones start out as drawn
+# placeholders and are downloaded in the background, so startup never
+# waits on the network.
+assets.add_image("background", "background.png", "https://i.ibb.co/vs3fG0F/road.png",
+                 load_background, (WIDTH, HEIGHT), make_road_placeholder)
+# Light backgrounds are removed once and the result is cached on disk
+assets.add_image("player", "player_car.png", "https://i.ibb.co/0F7ZVYQ/player_car.png",
+                 load_car_sprite, (PLAYER_WIDTH, PLAYER_HEIGHT),
+                 lambda size: make_car_placeholder(size, BLUE))
+assets.add_image("enemy", "enemy_car.png", "https://i.ibb.co/1zM5P6N/enemy_car.png",
+                 load_car_sprite, (ENEMY_WIDTH, ENEMY_HEIGHT),
+                 lambda size: make_car_placeholder(size, RED))
+assets.start()
 
 # ===========================
 # Font
@@ -99,28 +76,42 @@ BLUE = (0, 150, 255)
 font_large = pygame.font.SysFont(None, 64)
 font_medium = pygame.font.SysFont(None, 40)
 font_small = pygame.font.SysFont(None, 28)
+font_tiny = pygame.font.SysFont(None, 18)
+
+# Rendered text is reused across frames instead of rasterized every frame
+text_cache = TextCache()
+
+# Static parts of each screen, composited once and reused every frame
+layers = LayerCache()
+
+# Translucent sprite variants and overlays, so drawing never allocates them
+resources = SurfaceCache()
+
+# Gameplay sprites are queued and submitted with one blits() call per frame
+render_queue = RenderQueue()
+
+log = logging.getLogger(__name__)
 
 # ===========================
 # Variables
 # ===========================
-player_x = WIDTH // 2 - 25  # Will be set properly after loading
-player_y = HEIGHT - 120
-player_speed = 5
-player_lives = 3
+# Simulation state lives in GameState; this module only draws it.
+state = GameState()
+
+# Input recorder for --record, None when not recording
+recorder = None
 
-enemies = []
-powerups = []
-particles = []
+# Simulation thread for --pipelined, None when simulating in the frame loop
+pipeline = None
 
-score = 0
-high_score = 0
-level = 1
-bg_scroll = 0
-bg_speed = 3
+# Keyboard state read right before drawing for --low-latency, else None
+live_inputs = None
 
-# Road line animation
-line_offset = 0
-line_speed = 8
+# Frame profiler (F3); NULL_PROFILER while off
+profiler = NULL_PROFILER
+frame_profiler = None
+PROFILER_REFRESH = 30  # Overlay numbers are refreshed every 30 frames
+profiler_averages = {}
 
 # Menu animation
 menu_animation_time = 0
@@ -128,7 +119,13 @@ menu_cars = []
 
 # Winner animation
 winner_animation_time = 0
+confetti_clock = 0
 confetti_particles = []
+# Most confetti pieces alive on the winner screen
+confetti_cap = 200
+
+# Effect detail, changed by apply_quality() (see quality.py)
+quality = QUALITY_TIERS[0]
 
 # Create menu animated cars
 for i in range(3):
@@ -138,92 +135,18 @@ for i in range(3):
         'speed': random.randint(2, 5)
     })
 
-# Power-up types
-POWERUP_SHIELD = 0
-POWERUP_SLOW = 1
-POWERUP_BOOST = 2
-
-shield_active = False
-shield_timer = 0
-slow_active = False
-slow_timer = 0
-boost_active = False
-boost_timer = 0
-
 # ===========================
 # Classes
 # ===========================
-class Enemy:
-    def __init__(self):
-        self.x = random.randint(60, WIDTH - enemy_width - 60)
-        self.y = random.randint(-600, -enemy_height)
-        self.speed = random.randint(3, 5) + level
-        self.img = enemy_img
-        
-    def update(self):
-        global slow_active
-        speed = self.speed * 0.5 if slow_active else self.speed
-        self.y += speed
-        
-    def draw(self):
-        screen.blit(self.img, (self.x, self.y))
-        
-    def get_rect(self):
-        return pygame.Rect(self.x, self.y, enemy_width, enemy_height)
-
-class PowerUp:
-    def __init__(self, powerup_type):
-        self.x = random.randint(60, WIDTH - 30 - 60)
-        self.y = random.randint(-400, -30)
-        self.speed = 2
-        self.type = powerup_type
-        self.size = 30
-        
-        if powerup_type == POWERUP_SHIELD:
-            self.color = BLUE
-        elif powerup_type == POWERUP_SLOW:
-            self.color = YELLOW
-        else:
-            self.color = GREEN
-            
-    def update(self):
-        self.y += self.speed
-        
-    def draw(self):
-        pygame.draw.circle(screen, self.color, (int(self.x + self.size//2), int(self.y + self.size//2)), self.size//2)
-        
-        if self.type == POWERUP_SHIELD:
-            text = font_small.render("S", True, WHITE)
-        elif self.type == POWERUP_SLOW:
-            text = font_small.render("T", True, BLACK)
-        else:
-            text = font_small.render("B", True, WHITE)
-            
-        screen.blit(text, (self.x + 8, self.y + 5))
-        
-    def get_rect(self):
-        return pygame.Rect(self.x, self.y, self.size, self.size)
-
-class Particle:
-    def __init__(self, x, y, color):
-        self.x = x
-        self.y = y
-        self.vx = random.randint(-5, 5)
-        self.vy = random.randint(-5, 5)
-        self.life = 30
-        self.color = color
-        
-    def update(self):
-        self.x += self.vx
-        self.y += self.vy
-        self.life -= 1
-        
-    def draw(self):
-        if self.life > 0:
-            pygame.draw.circle(screen, self.color, (int(self.x), int(self.y)), 3)
+CONFETTI_COLORS = [RED, GREEN, BLUE, YELLOW, (255, 0, 255), (0, 255, 255)]
 
 class Confetti:
+    __slots__ = ("x", "y", "vx", "vy", "gravity", "rotation", "rotation_speed", "size", "color")
+
     def __init__(self, x, y):
+        self.reset(x, y)
+
+    def reset(self, x, y):
         self.x = x
         self.y = y
         self.vx = random.randint(-3, 3)
@@ -232,321 +155,616 @@ class Confetti:
         self.rotation = random.randint(0, 360)
         self.rotation_speed = random.randint(-10, 10)
         self.size = random.randint(4, 8)
-        self.color = random.choice([RED, GREEN, BLUE, YELLOW, (255, 0, 255), (0, 255, 255)])
+        self.color = random.choice(CONFETTI_COLORS)
         
-    def update(self):
-        self.vy += self.gravity
-        self.x += self.vx
-        self.y += self.vy
-        self.rotation += self.rotation_speed
-        
-    def draw(self):
-        # Draw rotating rectangle confetti
-        points = []
-        for i in range(4):
-            angle = math.radians(self.rotation + i * 90)
-            px = self.x + math.cos(angle) * self.size
-            py = self.y + math.sin(angle) * self.size
-            points.append((px, py))
-        if len(points) >= 3:
-            pygame.draw.polygon(screen, self.color, points)
+    def update(self, frames=1):
+        # frames: elapsed time in 60 FPS frames
+        self.vy += self.gravity * frames
+        self.x += self.vx * frames
+        self.y += self.vy * frames
+        self.rotation += self.rotation_speed * frames
+
+# Winner screen confetti is recycled instead of reallocated
+confetti_pool = ObjectPool(Confetti, max_size=512)
 
 # ===========================
 # Functions
 # ===========================
-def reset_game():
-    global player_x, player_y, enemies, powerups, particles
-    global score, level, player_lives, bg_scroll, line_offset
-    global shield_active, shield_timer, slow_active, slow_timer, boost_active, boost_timer
-    global winner_animation_time, confetti_particles
-    
-    player_x = WIDTH // 2 - player_width // 2
-    player_y = HEIGHT - player_height - 20
-    player_lives = 3
-    enemies = []
-    powerups = []
-    particles = []
-    confetti_particles = []
-    score = 0
-    level = 1
-    bg_scroll = 0
-    line_offset = 0
+def start_game():
+    if recorder is not None:
+        recorder.mark_start()
+    state.start()
+    if pipeline is not None:
+        # Runs on the simulation thread; the renderer resets its own
+        # animations when it sees the new game in the next snapshot
+        pipeline.games += 1
+    else:
+        reset_animations()
+
+def reset_animations():
+    global winner_animation_time, confetti_clock, confetti_particles
+
     winner_animation_time = 0
-    shield_active = False
-    shield_timer = 0
-    slow_active = False
-    slow_timer = 0
-    boost_active = False
-    boost_timer = 0
-    
-    for i in range(3):
-        enemies.append(Enemy())
+    confetti_clock = 0
+    confetti_pool.release_all(confetti_particles)
+    confetti_particles = []
 
-def spawn_enemy():
-    if len(enemies) < 5 + level:
-        if random.random() < 0.02 + level * 0.005:
-            enemies.append(Enemy())
+def animate(state, dt):
+    # Advance the menu and winner screen animations by one simulation tick
+    global menu_animation_time, winner_animation_time, confetti_clock, confetti_particles
+    frames = dt * REFERENCE_FPS
 
-def spawn_powerup():
-    if len(powerups) < 2:
-        if random.random() < 0.005:
-            powerups.append(PowerUp(random.randint(0, 2)))
+    if state.mode == MENU:
+        menu_animation_time += frames
+        for car in menu_cars:
+            car['y'] += car['speed'] * frames
+            if car['y'] > HEIGHT:
+                car['y'] = -100
+                car['x'] = random.randint(60, WIDTH - 60)
 
-def create_explosion(x, y, color):
-    for _ in range(15):
-        particles.append(Particle(x, y, color))
+    elif state.mode == WINNER:
+        winner_animation_time += frames
 
-def draw_menu():
-    global menu_animation_time, menu_cars
-    
-    # Animated road background
-    screen.fill((40, 40, 40))
-    
-    # Draw white side lines
-    pygame.draw.rect(screen, (255, 255, 255), (50, 0, 8, HEIGHT))
-    pygame.draw.rect(screen, (255, 255, 255), (WIDTH - 58, 0, 8, HEIGHT))
-    
-    # Animated center lines
-    menu_animation_time += 1
-    offset = (menu_animation_time * 3) % 80
+        # Spawn confetti every 3 frames
+        confetti_clock += frames
+        while confetti_clock >= 3:
+            confetti_clock -= 3
+            if len(confetti_particles) < confetti_cap:
+                for _ in range(5):
+                    confetti_particles.append(confetti_pool.acquire(random.randint(0, WIDTH), -10))
+
+        alive = []
+        for confetti in confetti_particles:
+            confetti.update(frames)
+            if confetti.y > HEIGHT:
+                confetti_pool.release(confetti)
+            else:
+                alive.append(confetti)
+        confetti_particles = alive
+
+def apply_quality(tier, state):
+    global quality, confetti_cap
+    quality = tier
+    confetti_cap = tier.confetti_cap
+    if pipeline is not None:
+        # The simulation thread owns the state
+        pipeline.send(partial(setattr, state, "explosion_particles", tier.explosion_particles))
+    else:
+        state.explosion_particles = tier.explosion_particles
+
+def build_road_layer():
+    # Asphalt and white side lines, shared by every road screen
+    layer = pygame.Surface((WIDTH, HEIGHT))
+    layer.fill((40, 40, 40))  # Dark gray asphalt
+
+    # Draw white side lines (road edges)
+    pygame.draw.rect(layer, (255, 255, 255), (50, 0, 8, HEIGHT))
+    pygame.draw.rect(layer, (255, 255, 255), (WIDTH - 58, 0, 8, HEIGHT))
+    return layer
+
+def build_simple_road_layer():
+    # Road with the center dashes baked in, for tiers without road detail
+    layer = build_road_layer()
+    for y_pos in range(0, HEIGHT, 80):
+        pygame.draw.rect(layer, (255, 200, 0), (WIDTH//2 - 4, y_pos, 8, 50))
+    return layer
+
+def road_layer():
+    if quality.road_detail:
+        return layers.get("road", None, build_road_layer)
+    return layers.get("road_simple", None, build_simple_road_layer)
+
+def draw_center_lines(line_offset):
+    # Draw yellow center dashed lines, returns the strip they scroll in
     for i in range(-80, HEIGHT + 80, 80):
-        y_pos = i + offset
+        y_pos = i + line_offset
         pygame.draw.rect(screen, (255, 200, 0), (WIDTH//2 - 4, y_pos, 8, 50))
+    return pygame.Rect(WIDTH//2 - 4, 0, 8, HEIGHT)
+
+def build_powerup_sprite(powerup_type):
+    # Colored circle with its letter, drawn once per type
+    size = 30
+    sprite = pygame.Surface((size, size), pygame.SRCALPHA)
+    pygame.draw.circle(sprite, POWERUP_COLORS[powerup_type], (size//2, size//2), size//2)
+
+    if powerup_type == POWERUP_SHIELD:
+        text = text_cache.render(font_small, "S", WHITE)
+    elif powerup_type == POWERUP_SLOW:
+        text = text_cache.render(font_small, "T", BLACK)
+    else:
+        text = text_cache.render(font_small, "B", WHITE)
+
+    sprite.blit(text, (8, 5))
+    return sprite
+
+def queue_entities(state, alpha):
+    # Enemies, power-ups and particles as queued sprite blits
+    render_queue.add_many(LAYER_ENEMIES, assets["enemy"], state.enemy_positions(alpha))
+
+    for x, y, powerup_type in state.powerup_items(alpha):
+        sprite = layers.get(f"powerup_{powerup_type}", None, lambda: build_powerup_sprite(powerup_type))
+        render_queue.add(LAYER_POWERUPS, sprite, (x, y))
+
+    # Particles grouped by color first, one bucket per sprite
+    particles = {}
+    for x, y, color in state.particle_items(alpha):
+        positions = particles.get(color)
+        if positions is None:
+            positions = particles[color] = []
+        positions.append((int(x) - 3, int(y) - 3))
+    for color, positions in particles.items():
+        render_queue.add_many(LAYER_PARTICLES, resources.circle(color, 3), positions)
+
+def draw_playing(state, dirty=None, alpha=1.0):
+    # With a DirtyRectTracker only last frame's rects and the center line
+    # strip are repainted; the drawn rects are handed back to the tracker.
+    # alpha interpolates entity positions between the last two ticks.
+    road = road_layer()
+    if dirty is None or dirty.full:
+        screen.blit(road, (0, 0))
+    else:
+        dirty.restore(screen, road)
+        if quality.road_detail:
+            strip = pygame.Rect(WIDTH//2 - 4, 0, 8, HEIGHT)
+            screen.blit(road, strip, strip)
+
+    center_lines = None
+    if quality.road_detail:
+        center_lines = draw_center_lines(state.road_offset(alpha))
+    queue_entities(state, alpha)
+
+    # Draw player with shield
+    if live_inputs is not None:
+        player_x, player_y = predict_player_position(state, live_inputs, alpha)
+    else:
+        player_x, player_y = state.player_position(alpha)
+    if state.shield_active:
+        ring = resources.circle(BLUE, 50, 3)
+        render_queue.add(LAYER_SHIELD, ring, (int(player_x + PLAYER_WIDTH//2) - 50, int(player_y + PLAYER_HEIGHT//2) - 50))
+
+    render_queue.add(LAYER_PLAYER, assets["player"], (player_x, player_y))
+
+    profiler.end("draw")
+    profiler.begin("hud")
+    queue_hud(state)
+    profiler.end("hud")
+    profiler.begin("draw")
+
+    rects = render_queue.flush(screen)
+    if dirty is not None:
+        if center_lines is not None:
+            dirty.add(center_lines)
+        dirty.add_all(rects)
+
+def build_menu_layer(state):
+    # Everything on the menu that does not move, drawn over the road
+    layer = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
+
+    # Dark overlay for text readability
+    layer.fill((0, 0, 0, 180))
     
-    # Update and draw animated cars in background
-    for car in menu_cars:
-        car['y'] += car['speed']
-        if car['y'] > HEIGHT:
-            car['y'] = -100
-            car['x'] = random.randint(60, WIDTH - 60)
-        
-        # Draw semi-transparent cars
-        temp_surf = enemy_img.copy()
-        temp_surf.set_alpha(100)
-        screen.blit(temp_surf, (car['x'], car['y']))
-    
-    # Draw dark overlay for text readability
-    overlay = pygame.Surface((WIDTH, HEIGHT))
-    overlay.set_alpha(180)
-    overlay.fill(BLACK)
-    screen.blit(overlay, (0, 0))
-    
-    # Animated title with glow effect
-    pulse = abs((menu_animation_time % 60) - 30) / 30
-    title_color = (255, int(255 * pulse), 0)
-    
-    # Title shadow/glow
-    for offset in [(2, 2), (-2, -2), (2, -2), (-2, 2)]:
-        title_shadow = font_large.render("MOBIL BALAP", True, (100, 50, 0))
-        screen.blit(title_shadow, (WIDTH//2 - title_shadow.get_width()//2 + offset[0], 100 + offset[1]))
-    
-    title = font_large.render("MOBIL BALAP", True, title_color)
-    screen.blit(title, (WIDTH//2 - title.get_width()//2, 100))
-    
-    # Animated subtitle
-    subtitle = font_small.render("~ Racing Adventure ~", True, WHITE)
-    screen.blit(subtitle, (WIDTH//2 - subtitle.get_width()//2, 165))
-    
-    # Pulsing start button
-    pulse_start = 1 + 0.2 * math.sin(menu_animation_time * 0.1)
-    start_size = int(40 * pulse_start)
-    start_font = pygame.font.SysFont(None, start_size)
-    start_text = start_font.render(">> ENTER - Mulai <<", True, GREEN)
+    # Subtitle
+    subtitle = text_cache.render(font_small, "~ Racing Adventure ~", WHITE)
+    layer.blit(subtitle, (WIDTH//2 - subtitle.get_width()//2, 165))
     
     # Start button background
     start_rect = pygame.Rect(WIDTH//2 - 140, 270, 280, 60)
-    pygame.draw.rect(screen, (0, 80, 0), start_rect, border_radius=10)
-    pygame.draw.rect(screen, GREEN, start_rect, 3, border_radius=10)
-    
-    screen.blit(start_text, (WIDTH//2 - start_text.get_width()//2, 280))
+    pygame.draw.rect(layer, (0, 80, 0), start_rect, border_radius=10)
+    pygame.draw.rect(layer, GREEN, start_rect, 3, border_radius=10)
     
     # Controls section with icons
     controls_y = 370
-    pygame.draw.rect(screen, (30, 30, 30), (60, controls_y - 10, WIDTH - 120, 80), border_radius=8)
-    pygame.draw.rect(screen, WHITE, (60, controls_y - 10, WIDTH - 120, 80), 2, border_radius=8)
+    pygame.draw.rect(layer, (30, 30, 30), (60, controls_y - 10, WIDTH - 120, 80), border_radius=8)
+    pygame.draw.rect(layer, WHITE, (60, controls_y - 10, WIDTH - 120, 80), 2, border_radius=8)
     
-    controls_title = font_small.render("KONTROL:", True, YELLOW)
-    screen.blit(controls_title, (WIDTH//2 - controls_title.get_width()//2, controls_y))
+    controls_title = text_cache.render(font_small, "KONTROL:", YELLOW)
+    layer.blit(controls_title, (WIDTH//2 - controls_title.get_width()//2, controls_y))
     
     # Draw arrow keys
     arrow_y = controls_y + 35
     # Left arrow
-    pygame.draw.polygon(screen, WHITE, [(120, arrow_y), (140, arrow_y - 10), (140, arrow_y + 10)])
+    pygame.draw.polygon(layer, WHITE, [(120, arrow_y), (140, arrow_y - 10), (140, arrow_y + 10)])
     # Right arrow  
-    pygame.draw.polygon(screen, WHITE, [(360, arrow_y), (340, arrow_y - 10), (340, arrow_y + 10)])
+    pygame.draw.polygon(layer, WHITE, [(360, arrow_y), (340, arrow_y - 10), (340, arrow_y + 10)])
     
-    controls_text = font_small.render("Gerakkan Mobil", True, WHITE)
-    screen.blit(controls_text, (WIDTH//2 - controls_text.get_width()//2, arrow_y - 8))
+    controls_text = text_cache.render(font_small, "Gerakkan Mobil", WHITE)
+    layer.blit(controls_text, (WIDTH//2 - controls_text.get_width()//2, arrow_y - 8))
     
     # Power-ups section with colored boxes
     powerup_y = 480
-    powerup_title = font_small.render("POWER-UPS:", True, YELLOW)
-    screen.blit(powerup_title, (WIDTH//2 - powerup_title.get_width()//2, powerup_y))
+    powerup_title = text_cache.render(font_small, "POWER-UPS:", YELLOW)
+    layer.blit(powerup_title, (WIDTH//2 - powerup_title.get_width()//2, powerup_y))
     
     # Shield
-    pygame.draw.circle(screen, BLUE, (100, powerup_y + 40), 18)
-    shield_text = font_small.render("S", True, WHITE)
-    screen.blit(shield_text, (94, powerup_y + 28))
-    shield_label = font_small.render("Shield", True, WHITE)
-    screen.blit(shield_label, (75, powerup_y + 60))
+    pygame.draw.circle(layer, BLUE, (100, powerup_y + 40), 18)
+    shield_text = text_cache.render(font_small, "S", WHITE)
+    layer.blit(shield_text, (94, powerup_y + 28))
+    shield_label = text_cache.render(font_small, "Shield", WHITE)
+    layer.blit(shield_label, (75, powerup_y + 60))
     
     # Slow
-    pygame.draw.circle(screen, YELLOW, (WIDTH//2, powerup_y + 40), 18)
-    slow_text = font_small.render("T", True, BLACK)
-    screen.blit(slow_text, (WIDTH//2 - 6, powerup_y + 28))
-    slow_label = font_small.render("Slow", True, WHITE)
-    screen.blit(slow_label, (WIDTH//2 - 25, powerup_y + 60))
+    pygame.draw.circle(layer, YELLOW, (WIDTH//2, powerup_y + 40), 18)
+    slow_text = text_cache.render(font_small, "T", BLACK)
+    layer.blit(slow_text, (WIDTH//2 - 6, powerup_y + 28))
+    slow_label = text_cache.render(font_small, "Slow", WHITE)
+    layer.blit(slow_label, (WIDTH//2 - 25, powerup_y + 60))
     
     # Boost
-    pygame.draw.circle(screen, GREEN, (380, powerup_y + 40), 18)
-    boost_text = font_small.render("B", True, WHITE)
-    screen.blit(boost_text, (374, powerup_y + 28))
-    boost_label = font_small.render("Boost", True, WHITE)
-    screen.blit(boost_label, (355, powerup_y + 60))
+    pygame.draw.circle(layer, GREEN, (380, powerup_y + 40), 18)
+    boost_text = text_cache.render(font_small, "B", WHITE)
+    layer.blit(boost_text, (374, powerup_y + 28))
+    boost_label = text_cache.render(font_small, "Boost", WHITE)
+    layer.blit(boost_label, (355, powerup_y + 60))
     
     # High score with trophy
-    if high_score > 0:
+    if state.high_score > 0:
         hs_y = 590
-        pygame.draw.rect(screen, (60, 40, 0), (WIDTH//2 - 100, hs_y - 5, 200, 35), border_radius=5)
-        pygame.draw.rect(screen, YELLOW, (WIDTH//2 - 100, hs_y - 5, 200, 35), 2, border_radius=5)
+        pygame.draw.rect(layer, (60, 40, 0), (WIDTH//2 - 100, hs_y - 5, 200, 35), border_radius=5)
+        pygame.draw.rect(layer, YELLOW, (WIDTH//2 - 100, hs_y - 5, 200, 35), 2, border_radius=5)
         
-        trophy = font_medium.render("🏆", True, YELLOW)
-        screen.blit(trophy, (WIDTH//2 - 80, hs_y - 5))
+        trophy = text_cache.render(font_medium, "🏆", YELLOW)
+        layer.blit(trophy, (WIDTH//2 - 80, hs_y - 5))
         
-        hs_text = font_small.render(f"High Score: {high_score}", True, YELLOW)
-        screen.blit(hs_text, (WIDTH//2 - 35, hs_y))
+        hs_text = text_cache.render_slot("high_score", font_small, f"High Score: {state.high_score}", YELLOW)
+        layer.blit(hs_text, (WIDTH//2 - 35, hs_y))
+
+    return layer
 
-def draw_game_over():
-    # Animated road background  
-    screen.fill((40, 40, 40))
+# ===========================
+# Animation atlases
+# ===========================
+# Pulsing texts are rendered once per font size or color step instead of
+# creating a SysFont every frame. Sizes cover the full sin() range.
+TITLE_COLOR_STEPS = 30
+
+def build_title_atlas():
+    return FrameAtlas(range(TITLE_COLOR_STEPS + 1), lambda step: font_large.render(
+        "MOBIL BALAP", True, (255, int(255 * step / TITLE_COLOR_STEPS), 0)))
+
+def build_start_atlas():
+    # int(40 * (1 + 0.2 * sin)) -> 32..48
+    return FrameAtlas(range(32, 49), lambda size: pygame.font.SysFont(None, size).render(
+        ">> ENTER - Mulai <<", True, GREEN))
+
+def build_winner_atlas():
+    # int(72 * (1 + 0.15 * sin)) -> 61..82, shadow and text per size
+    def build(size):
+        font = pygame.font.SysFont(None, size)
+        return font.render("WINNER!", True, (100, 50, 0)), font.render("WINNER!", True, YELLOW)
+    return FrameAtlas(range(61, 83), build)
+
+# Confetti squares look the same every 90 degrees, so 30 steps of 3
+# degrees cover every rotation
+CONFETTI_ANGLE_STEP = 3
+
+# Unit star: 10 points alternating outer and inner (half) radius
+STAR_POINTS = [(math.cos(math.radians(j * 36 - 90)) * (1 if j % 2 == 0 else 0.5),
+                math.sin(math.radians(j * 36 - 90)) * (1 if j % 2 == 0 else 0.5))
+               for j in range(10)]
+
+def build_confetti_atlas():
+    # One sprite per color, size (4..8) and rotation step, centered at
+    # (size + 1, size + 1). Colorkeyed instead of per-pixel alpha, which
+    # blits noticeably faster for thousands of pieces.
+    def build(key):
+        color, size, step = key
+        sprite = pygame.Surface((2 * size + 2, 2 * size + 2))
+        sprite.set_colorkey(BLACK)
+        points = []
+        for i in range(4):
+            angle = math.radians(step * CONFETTI_ANGLE_STEP + i * 90)
+            points.append((size + 1 + math.cos(angle) * size, size + 1 + math.sin(angle) * size))
+        pygame.draw.polygon(sprite, color, points)
+        return sprite
+    keys = [(color, size, step) for color in CONFETTI_COLORS for size in range(4, 9)
+            for step in range(90 // CONFETTI_ANGLE_STEP)]
+    return FrameAtlas(keys, build)
+
+def build_star_atlas():
+    # Keyed by twice the star radius (25..35 in half pixel steps)
+    def build(key):
+        size = key / 2
+        center = int(size) + 3
+        sprite = pygame.Surface((2 * center, 2 * center), pygame.SRCALPHA)
+        points = [(center + x * size, center + y * size) for x, y in STAR_POINTS]
+        pygame.draw.polygon(sprite, YELLOW, points)
+        pygame.draw.polygon(sprite, (218, 165, 32), points, 2)
+        return sprite
+    return FrameAtlas(range(50, 71), build)
+
+ATLAS_BUILDERS = {
+    "title": build_title_atlas,
+    "start": build_start_atlas,
+    "winner": build_winner_atlas,
+    "confetti": build_confetti_atlas,
+    "star": build_star_atlas,
+}
+
+def get_atlas(name):
+    # Built on first use (or by build_atlases at startup) and kept
+    return layers.get(f"atlas_{name}", None, lambda: log_atlas(name, ATLAS_BUILDERS[name]()))
+
+def log_atlas(name, atlas):
+    log.info("Built %s atlas: %d frames, %.1f KiB in %.1f ms",
+             name, len(atlas), atlas.bytes / 1024, atlas.build_time * 1000)
+    return atlas
+
+def build_atlases():
+    total_time = total_bytes = 0
+    for name in ATLAS_BUILDERS:
+        atlas = get_atlas(name)
+        total_time += atlas.build_time
+        total_bytes += atlas.bytes
+    log.info("Animation atlases ready: %.1f KiB in %.1f ms", total_bytes / 1024, total_time * 1000)
+
+def draw_menu(state):
+    # Animated road background
+    screen.blit(road_layer(), (0, 0))
+    
+    # Animated center lines
+    if quality.road_detail:
+        offset = (menu_animation_time * 3) % 80
+        for i in range(-80, HEIGHT + 80, 80):
+            y_pos = i + offset
+            pygame.draw.rect(screen, (255, 200, 0), (WIDTH//2 - 4, y_pos, 8, 50))
+    
+    # Draw animated cars in background
+    for car in menu_cars:
+        # Draw semi-transparent cars
+        screen.blit(resources.translucent(assets["enemy"], 100), (car['x'], car['y']))
+    
+    # Overlay, panels and labels
+    screen.blit(layers.get("menu", state.high_score, lambda: build_menu_layer(state)), (0, 0))
+    
+    # Animated title with glow effect
+    pulse = abs((menu_animation_time % 60) - 30) / 30
+    
+    # Title shadow/glow
+    title_shadow = text_cache.render(font_large, "MOBIL BALAP", (100, 50, 0))
+    for offset in [(2, 2), (-2, -2), (2, -2), (-2, 2)][:quality.shadow_passes]:
+        screen.blit(title_shadow, (WIDTH//2 - title_shadow.get_width()//2 + offset[0], 100 + offset[1]))
+    
+    title = get_atlas("title")[round(pulse * TITLE_COLOR_STEPS)]
+    screen.blit(title, (WIDTH//2 - title.get_width()//2, 100))
+    
+    # Pulsing start button
+    pulse_start = 1 + 0.2 * math.sin(menu_animation_time * 0.1)
+    start_text = get_atlas("start")[int(40 * pulse_start)]
     
-    pygame.draw.rect(screen, (255, 255, 255), (50, 0, 8, HEIGHT))
-    pygame.draw.rect(screen, (255, 255, 255), (WIDTH - 58, 0, 8, HEIGHT))
+    screen.blit(start_text, (WIDTH//2 - start_text.get_width()//2, 280))
+
+def build_game_over_layer(state):
+    # Road background
+    layer = layers.get("road", None, build_road_layer).copy()
     
     # Dark overlay
-    overlay = pygame.Surface((WIDTH, HEIGHT))
-    overlay.set_alpha(200)
-    overlay.fill(BLACK)
-    screen.blit(overlay, (0, 0))
+    layer.blit(resources.overlay((WIDTH, HEIGHT), BLACK, 200), (0, 0))
     
     # Game Over text with red glow
+    shadow = text_cache.render(font_large, "GAME OVER", (80, 0, 0))
     for offset in [(3, 3), (-3, -3), (3, -3), (-3, 3)]:
-        shadow = font_large.render("GAME OVER", True, (80, 0, 0))
-        screen.blit(shadow, (WIDTH//2 - shadow.get_width()//2 + offset[0], 150 + offset[1]))
+        layer.blit(shadow, (WIDTH//2 - shadow.get_width()//2 + offset[0], 150 + offset[1]))
     
-    game_over_text = font_large.render("GAME OVER", True, RED)
-    screen.blit(game_over_text, (WIDTH//2 - game_over_text.get_width()//2, 150))
+    game_over_text = text_cache.render(font_large, "GAME OVER", RED)
+    layer.blit(game_over_text, (WIDTH//2 - game_over_text.get_width()//2, 150))
     
     # Score panel
     score_panel = pygame.Rect(WIDTH//2 - 150, 250, 300, 100)
-    pygame.draw.rect(screen, (20, 20, 20), score_panel, border_radius=15)
-    pygame.draw.rect(screen, YELLOW, score_panel, 3, border_radius=15)
+    pygame.draw.rect(layer, (20, 20, 20), score_panel, border_radius=15)
+    pygame.draw.rect(layer, YELLOW, score_panel, 3, border_radius=15)
     
-    score_label = font_small.render("SKOR AKHIR", True, WHITE)
-    screen.blit(score_label, (WIDTH//2 - score_label.get_width()//2, 265))
+    score_label = text_cache.render(font_small, "SKOR AKHIR", WHITE)
+    layer.blit(score_label, (WIDTH//2 - score_label.get_width()//2, 265))
     
-    score_text = font_large.render(str(score), True, YELLOW)
-    screen.blit(score_text, (WIDTH//2 - score_text.get_width()//2, 295))
+    score_text = text_cache.render_slot("game_over_score", font_large, str(state.score), YELLOW)
+    layer.blit(score_text, (WIDTH//2 - score_text.get_width()//2, 295))
     
     # New high score celebration
-    if score == high_score and score > 0:
+    if state.score == state.high_score and state.score > 0:
+        star_text = text_cache.render(font_medium, "★", YELLOW)
         for i in range(5):
             star_x = WIDTH//2 - 100 + i * 50
-            star_text = font_medium.render("★", True, YELLOW)
-            screen.blit(star_text, (star_x, 370))
+            layer.blit(star_text, (star_x, 370))
         
-        new_hs = font_medium.render("REKOR BARU!", True, YELLOW)
-        screen.blit(new_hs, (WIDTH//2 - new_hs.get_width()//2, 410))
+        new_hs = text_cache.render(font_medium, "REKOR BARU!", YELLOW)
+        layer.blit(new_hs, (WIDTH//2 - new_hs.get_width()//2, 410))
     
     # Restart button
     restart_rect = pygame.Rect(WIDTH//2 - 130, 470, 260, 50)
-    pygame.draw.rect(screen, (0, 80, 0), restart_rect, border_radius=10)
-    pygame.draw.rect(screen, GREEN, restart_rect, 3, border_radius=10)
+    pygame.draw.rect(layer, (0, 80, 0), restart_rect, border_radius=10)
+    pygame.draw.rect(layer, GREEN, restart_rect, 3, border_radius=10)
     
-    restart_text = font_medium.render("ENTER - Main Lagi", True, WHITE)
-    screen.blit(restart_text, (WIDTH//2 - restart_text.get_width()//2, 480))
+    restart_text = text_cache.render(font_medium, "ENTER - Main Lagi", WHITE)
+    layer.blit(restart_text, (WIDTH//2 - restart_text.get_width()//2, 480))
     
     # Menu button
     menu_rect = pygame.Rect(WIDTH//2 - 100, 540, 200, 45)
-    pygame.draw.rect(screen, (40, 40, 40), menu_rect, border_radius=10)
-    pygame.draw.rect(screen, WHITE, menu_rect, 2, border_radius=10)
+    pygame.draw.rect(layer, (40, 40, 40), menu_rect, border_radius=10)
+    pygame.draw.rect(layer, WHITE, menu_rect, 2, border_radius=10)
     
-    menu_text = font_small.render("ESC - Menu Utama", True, WHITE)
-    screen.blit(menu_text, (WIDTH//2 - menu_text.get_width()//2, 550))
+    menu_text = text_cache.render(font_small, "ESC - Menu Utama", WHITE)
+    layer.blit(menu_text, (WIDTH//2 - menu_text.get_width()//2, 550))
 
-def draw_hud():
-    score_text = font_small.render(f"Skor: {score}", True, WHITE)
-    screen.blit(score_text, (10, 10))
+    return layer
+
+def draw_game_over(state):
+    # Nothing on this screen moves, so it only changes with the scores
+    key = (state.score, state.high_score)
+    screen.blit(layers.get("game_over", key, lambda: build_game_over_layer(state)), (0, 0))
+
+def queue_hud(state):
+    add = render_queue.add
+
+    score_text = text_cache.render_slot("hud_score", font_small, f"Skor: {state.score}", WHITE)
+    add(LAYER_HUD, score_text, (10, 10))
     
-    level_text = font_small.render(f"Level: {level}", True, WHITE)
-    screen.blit(level_text, (10, 40))
+    level_text = text_cache.render_slot("hud_level", font_small, f"Level: {state.level}", WHITE)
+    add(LAYER_HUD, level_text, (10, 40))
     
-    lives_text = font_small.render(f"Nyawa: {player_lives}", True, RED)
-    screen.blit(lives_text, (WIDTH - 120, 10))
+    lives_text = text_cache.render_slot("hud_lives", font_small, f"Nyawa: {state.player_lives}", RED)
+    add(LAYER_HUD, lives_text, (WIDTH - 120, 10))
     
-    if shield_active:
-        shield_text = font_small.render(f"Shield: {shield_timer//60}s", True, BLUE)
-        screen.blit(shield_text, (WIDTH - 150, 40))
+    if state.shield_active:
+        shield_text = text_cache.render_slot("hud_shield", font_small, f"Shield: {int(state.shield_timer)}s", BLUE)
+        add(LAYER_HUD, shield_text, (WIDTH - 150, 40))
     
-    if slow_active:
-        slow_text = font_small.render(f"Slow: {slow_timer//60}s", True, YELLOW)
-        screen.blit(slow_text, (WIDTH - 150, 70))
+    if state.slow_active:
+        slow_text = text_cache.render_slot("hud_slow", font_small, f"Slow: {int(state.slow_timer)}s", YELLOW)
+        add(LAYER_HUD, slow_text, (WIDTH - 150, 70))
         
-    if boost_active:
-        boost_text = font_small.render(f"Boost: {boost_timer//60}s", True, GREEN)
-        screen.blit(boost_text, (WIDTH - 150, 100))
+    if state.boost_active:
+        boost_text = text_cache.render_slot("hud_boost", font_small, f"Boost: {int(state.boost_timer)}s", GREEN)
+        add(LAYER_HUD, boost_text, (WIDTH - 150, 100))
+
+def set_profiling(enabled):
+    # Swap the real profiler in or out; its history survives being hidden
+    global profiler, frame_profiler
+
+    if enabled:
+        if frame_profiler is None:
+            frame_profiler = FrameProfiler()
+        profiler = frame_profiler
+    else:
+        profiler = NULL_PROFILER
+    if pipeline is None:
+        # Simulation phases are only timed on the frame loop's thread
+        state.profiler = profiler
+
+def surface_allocations():
+    # Surfaces the render path has created so far. Every one of them comes
+    # from a cache miss or a layer build, so this is their sum.
+    return text_cache.misses + layers.builds + resources.allocations
+
+def build_profiler_panel():
+    panel = pygame.Surface((230, 170), pygame.SRCALPHA)
+    panel.fill((0, 0, 0, 170))
+    return panel
 
-def draw_pause():
-    # Draw semi-transparent overlay
-    overlay = pygame.Surface((WIDTH, HEIGHT))
-    overlay.set_alpha(180)
-    overlay.fill(BLACK)
-    screen.blit(overlay, (0, 0))
+def draw_profiler_overlay(surfaces):
+    # Frame time graph (one bar per frame, 60 FPS budget line), the average
+    # time of every phase and the surfaces allocated drawing this frame,
+    # returns the rect drawn over
+    global profiler_averages
+
+    x, y = 10, HEIGHT - 180
+    rect = screen.blit(layers.get("profiler", None, build_profiler_panel), (x, y))
+
+    graph_height = 50
+    budget_ms = 1000 / REFERENCE_FPS
+    for i, row in enumerate(profiler.recent(110)):
+        ms = row[1] * 1000
+        bar = min(graph_height, int(ms / (2 * budget_ms) * graph_height))
+        color = GREEN if ms <= budget_ms else RED
+        pygame.draw.line(screen, color, (x + 5 + i * 2, y + 5 + graph_height),
+                         (x + 5 + i * 2, y + 5 + graph_height - bar))
+    budget_y = y + 5 + graph_height // 2
+    pygame.draw.line(screen, YELLOW, (x + 5, budget_y), (x + 225, budget_y))
+
+    if profiler.frames % PROFILER_REFRESH == 0 or not profiler_averages:
+        profiler_averages = profiler.averages()
+
+    for i, name in enumerate(("frame",) + PHASES):
+        ms = profiler_averages.get(name, 0.0) * 1000
+        text = text_cache.render_slot(f"profiler_{name}", font_tiny, f"{name}: {ms:.2f} ms", WHITE)
+        screen.blit(text, (x + 5 + (i % 2) * 112, y + 65 + (i // 2) * 20))
+
+    text = text_cache.render_slot("profiler_surfaces", font_tiny, f"surfaces/frame: {surfaces}", WHITE)
+    screen.blit(text, (x + 5, y + 145))
+
+    return rect
+
+def build_pause_layer():
+    layer = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
+
+    # Semi-transparent overlay
+    layer.fill((0, 0, 0, 180))
     
     # Pause panel
     panel = pygame.Rect(WIDTH//2 - 150, HEIGHT//2 - 100, 300, 200)
-    pygame.draw.rect(screen, (30, 30, 30), panel, border_radius=15)
-    pygame.draw.rect(screen, YELLOW, panel, 4, border_radius=15)
+    pygame.draw.rect(layer, (30, 30, 30), panel, border_radius=15)
+    pygame.draw.rect(layer, YELLOW, panel, 4, border_radius=15)
     
     # Pause icon (two bars)
-    pygame.draw.rect(screen, YELLOW, (WIDTH//2 - 30, HEIGHT//2 - 60, 20, 50), border_radius=3)
-    pygame.draw.rect(screen, YELLOW, (WIDTH//2 + 10, HEIGHT//2 - 60, 20, 50), border_radius=3)
+    pygame.draw.rect(layer, YELLOW, (WIDTH//2 - 30, HEIGHT//2 - 60, 20, 50), border_radius=3)
+    pygame.draw.rect(layer, YELLOW, (WIDTH//2 + 10, HEIGHT//2 - 60, 20, 50), border_radius=3)
     
-    pause_text = font_large.render("PAUSE", True, YELLOW)
-    screen.blit(pause_text, (WIDTH//2 - pause_text.get_width()//2, HEIGHT//2 + 10))
+    pause_text = text_cache.render(font_large, "PAUSE", YELLOW)
+    layer.blit(pause_text, (WIDTH//2 - pause_text.get_width()//2, HEIGHT//2 + 10))
     
-    continue_text = font_small.render("P - Lanjutkan", True, WHITE)
-    screen.blit(continue_text, (WIDTH//2 - continue_text.get_width()//2, HEIGHT//2 + 65))
+    continue_text = text_cache.render(font_small, "P - Lanjutkan", WHITE)
+    layer.blit(continue_text, (WIDTH//2 - continue_text.get_width()//2, HEIGHT//2 + 65))
     
-    menu_text = font_small.render("ESC - Menu", True, WHITE)
-    screen.blit(menu_text, (WIDTH//2 - menu_text.get_width()//2, HEIGHT//2 + 95))
+    menu_text = text_cache.render(font_small, "ESC - Menu", WHITE)
+    layer.blit(menu_text, (WIDTH//2 - menu_text.get_width()//2, HEIGHT//2 + 95))
+
+    return layer
+
+def draw_pause(state):
+    # Drawn over the last gameplay frame
+    screen.blit(layers.get("pause", None, build_pause_layer), (0, 0))
+
+def build_winner_background():
+    layer = pygame.Surface((WIDTH, HEIGHT))
 
-def draw_winner():
-    global winner_animation_time, confetti_particles
-    
-    # Animated background
-    screen.fill((20, 20, 50))
-    
     # Gradient effect
     for i in range(HEIGHT):
         alpha = int(100 * (i / HEIGHT))
         color = (20 + alpha, 20 + alpha, 50 + alpha)
-        pygame.draw.line(screen, color, (0, i), (WIDTH, i))
+        pygame.draw.line(layer, color, (0, i), (WIDTH, i))
+    return layer
+
+def build_winner_layer(state):
+    # Messages, score panel and buttons
+    layer = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
+
+    # Congratulations message
+    congrats = text_cache.render(font_medium, "Selamat! Anda Menyelesaikan", WHITE)
+    layer.blit(congrats, (WIDTH//2 - congrats.get_width()//2, 290))
     
-    winner_animation_time += 1
+    level_text = text_cache.render(font_medium, "Semua 5 Level!", GREEN)
+    layer.blit(level_text, (WIDTH//2 - level_text.get_width()//2, 330))
     
-    # Spawn confetti
-    if winner_animation_time % 3 == 0 and len(confetti_particles) < 200:
-        for _ in range(5):
-            confetti_particles.append(Confetti(random.randint(0, WIDTH), -10))
+    # Final score panel
+    score_panel = pygame.Rect(WIDTH//2 - 140, 460, 280, 80)
+    pygame.draw.rect(layer, (30, 30, 60), score_panel, border_radius=15)
+    pygame.draw.rect(layer, YELLOW, score_panel, 3, border_radius=15)
     
-    # Update and draw confetti
-    for confetti in confetti_particles[:]:
-        confetti.update()
-        if confetti.y > HEIGHT:
-            confetti_particles.remove(confetti)
-        else:
-            confetti.draw()
+    final_label = text_cache.render(font_small, "SKOR AKHIR", WHITE)
+    layer.blit(final_label, (WIDTH//2 - final_label.get_width()//2, 475))
+    
+    final_score = text_cache.render_slot("winner_score", font_medium, str(state.score), YELLOW)
+    layer.blit(final_score, (WIDTH//2 - final_score.get_width()//2, 505))
+    
+    # Buttons
+    play_again_rect = pygame.Rect(WIDTH//2 - 120, 565, 240, 45)
+    pygame.draw.rect(layer, (0, 100, 0), play_again_rect, border_radius=10)
+    pygame.draw.rect(layer, GREEN, play_again_rect, 3, border_radius=10)
+    
+    play_text = text_cache.render(font_small, "ENTER - Main Lagi", WHITE)
+    layer.blit(play_text, (WIDTH//2 - play_text.get_width()//2, 573))
+    
+    menu_rect = pygame.Rect(WIDTH//2 - 90, 620, 180, 35)
+    pygame.draw.rect(layer, (40, 40, 40), menu_rect, border_radius=10)
+    pygame.draw.rect(layer, WHITE, menu_rect, 2, border_radius=10)
+    
+    menu_text = text_cache.render(font_small, "ESC - Menu", WHITE)
+    layer.blit(menu_text, (WIDTH//2 - menu_text.get_width()//2, 625))
+
+    return layer
+
+def draw_winner(state):
+    # Gradient background, flat mid color without road detail
+    if quality.road_detail:
+        screen.blit(layers.get("winner_background", None, build_winner_background), (0, 0))
+    else:
+        screen.fill((70, 70, 100))
+    
+    # Draw confetti, all pieces in one blits() call
+    sprites = get_atlas("confetti")
+    step = CONFETTI_ANGLE_STEP
+    screen.blits([(sprites[(confetti.color, confetti.size, int(confetti.rotation % 90) // step)],
+                   (confetti.x - confetti.size - 1, confetti.y - confetti.size - 1))
+                  for confetti in confetti_particles], False)
     
     # Draw giant trophy
     trophy_y = 120 + math.sin(winner_animation_time * 0.05) * 10
@@ -580,253 +798,304 @@ def draw_winner():
     
     # Winner text with animation
     pulse = 1 + 0.15 * math.sin(winner_animation_time * 0.1)
-    winner_size = int(72 * pulse)
-    winner_font = pygame.font.SysFont(None, winner_size)
+    shadow, winner_text = get_atlas("winner")[int(72 * pulse)]
     
     # Shadow
-    for offset in [(4, 4), (-4, -4), (4, -4), (-4, 4)]:
-        shadow = winner_font.render("WINNER!", True, (100, 50, 0))
+    for offset in [(4, 4), (-4, -4), (4, -4), (-4, 4)][:quality.shadow_passes]:
         screen.blit(shadow, (WIDTH//2 - shadow.get_width()//2 + offset[0], 35 + offset[1]))
     
-    winner_text = winner_font.render("WINNER!", True, YELLOW)
     screen.blit(winner_text, (WIDTH//2 - winner_text.get_width()//2, 35))
     
-    # Congratulations message
-    congrats = font_medium.render("Selamat! Anda Menyelesaikan", True, WHITE)
-    screen.blit(congrats, (WIDTH//2 - congrats.get_width()//2, 290))
-    
-    level_text = font_medium.render("Semua 5 Level!", True, GREEN)
-    screen.blit(level_text, (WIDTH//2 - level_text.get_width()//2, 330))
+    # Messages, score panel and buttons
+    screen.blit(layers.get("winner", state.score, lambda: build_winner_layer(state)), (0, 0))
     
     # Stars animation
+    stars = get_atlas("star")
     for i in range(5):
         star_x = WIDTH//2 - 100 + i * 50
         star_y = 380 + math.sin(winner_animation_time * 0.1 + i * 0.5) * 10
         star_size = 30 + math.sin(winner_animation_time * 0.15 + i) * 5
         
-        # Draw star
-        star_points = []
-        for j in range(10):
-            angle = math.radians(j * 36 - 90)
-            radius = star_size if j % 2 == 0 else star_size / 2
-            px = star_x + math.cos(angle) * radius
-            py = star_y + math.sin(angle) * radius
-            star_points.append((px, py))
-        
-        pygame.draw.polygon(screen, YELLOW, star_points)
-        pygame.draw.polygon(screen, (218, 165, 32), star_points, 2)
-    
-    # Final score panel
-    score_panel = pygame.Rect(WIDTH//2 - 140, 460, 280, 80)
-    pygame.draw.rect(screen, (30, 30, 60), score_panel, border_radius=15)
-    pygame.draw.rect(screen, YELLOW, score_panel, 3, border_radius=15)
-    
-    final_label = font_small.render("SKOR AKHIR", True, WHITE)
-    screen.blit(final_label, (WIDTH//2 - final_label.get_width()//2, 475))
-    
-    final_score = font_medium.render(str(score), True, YELLOW)
-    screen.blit(final_score, (WIDTH//2 - final_score.get_width()//2, 505))
-    
-    # Buttons
-    play_again_rect = pygame.Rect(WIDTH//2 - 120, 565, 240, 45)
-    pygame.draw.rect(screen, (0, 100, 0), play_again_rect, border_radius=10)
-    pygame.draw.rect(screen, GREEN, play_again_rect, 3, border_radius=10)
-    
-    play_text = font_small.render("ENTER - Main Lagi", True, WHITE)
-    screen.blit(play_text, (WIDTH//2 - play_text.get_width()//2, 573))
-    
-    menu_rect = pygame.Rect(WIDTH//2 - 90, 620, 180, 35)
-    pygame.draw.rect(screen, (40, 40, 40), menu_rect, border_radius=10)
-    pygame.draw.rect(screen, WHITE, menu_rect, 2, border_radius=10)
-    
-    menu_text = font_small.render("ESC - Menu", True, WHITE)
-    screen.blit(menu_text, (WIDTH//2 - menu_text.get_width()//2, 625))
+        # Pre-drawn star of the nearest half pixel size
+        star = stars[round(star_size * 2)]
+        center = star.get_width() // 2
+        screen.blit(star, (star_x - center, star_y - center))
 
 # ===========================
 # Game loop
 # ===========================
-running = True
-reset_game()
+def read_inputs():
+    keys = pygame.key.get_pressed()
+    return Inputs(left=keys[pygame.K_LEFT], right=keys[pygame.K_RIGHT])
 
-while running:
-    clock.tick(FPS)
-    
-    for event in pygame.event.get():
+def handle_events(events):
+    # Returns whether the window was closed and whether F3 was pressed
+    closed = toggled = False
+    for event in events:
         if event.type == pygame.QUIT:
-            running = False
-            
+            closed = True
+
         if event.type == pygame.KEYDOWN:
-            if game_state == MENU:
-                if event.key == pygame.K_RETURN:
-                    reset_game()
-                    game_state = PLAYING
-                    
-            elif game_state == PLAYING:
-                if event.key == pygame.K_p:
-                    game_state = PAUSED
-                    
-            elif game_state == PAUSED:
-                if event.key == pygame.K_p:
-                    game_state = PLAYING
-                if event.key == pygame.K_ESCAPE:
-                    game_state = MENU
-                    
-            elif game_state == GAME_OVER:
-                if event.key == pygame.K_RETURN:
-                    reset_game()
-                    game_state = PLAYING
-                if event.key == pygame.K_ESCAPE:
-                    game_state = MENU
-                    
-            elif game_state == WINNER:
-                if event.key == pygame.K_RETURN:
-                    reset_game()
-                    game_state = PLAYING
-                if event.key == pygame.K_ESCAPE:
-                    game_state = MENU
-    
-    if game_state == MENU:
-        draw_menu()
-        
-    elif game_state == PLAYING:
-        # Draw continuous road background
-        screen.fill((40, 40, 40))  # Dark gray asphalt
-        
-        # Draw white side lines (road edges)
-        pygame.draw.rect(screen, (255, 255, 255), (50, 0, 8, HEIGHT))
-        pygame.draw.rect(screen, (255, 255, 255), (WIDTH - 58, 0, 8, HEIGHT))
-        
-        # Animated center dashed lines
-        line_offset += line_speed
-        if line_offset >= 80:
-            line_offset = 0
-        
-        # Draw yellow center dashed lines
-        for i in range(-80, HEIGHT + 80, 80):
-            y_pos = i + line_offset
-            pygame.draw.rect(screen, (255, 200, 0), (WIDTH//2 - 4, y_pos, 8, 50))
-        
-        # Input player
-        keys = pygame.key.get_pressed()
-        speed = player_speed * 1.5 if boost_active else player_speed
-        
-        if keys[pygame.K_LEFT] and player_x > 60:
-            player_x -= speed
-        if keys[pygame.K_RIGHT] and player_x < WIDTH - player_width - 60:
-            player_x += speed
-        
-        # Spawn
-        spawn_enemy()
-        spawn_powerup()
-        
-        # Update enemies
-        for enemy in enemies[:]:
-            enemy.update()
-            if enemy.y > HEIGHT:
-                enemies.remove(enemy)
-                score += 10
-                
-                # Check for level up (max level 5)
-                if score % 100 == 0 and level < 5:
-                    level += 1
-                
-                # Check for winner (completed level 5)
-                if level >= 5 and score >= 500:
-                    if score > high_score:
-                        high_score = score
-                    game_state = WINNER
-        
-        # Update powerups
-        for powerup in powerups[:]:
-            powerup.update()
-            if powerup.y > HEIGHT:
-                powerups.remove(powerup)
-        
-        # Update particles
-        for particle in particles[:]:
-            particle.update()
-            if particle.life <= 0:
-                particles.remove(particle)
-        
-        # Update timers
-        if shield_active:
-            shield_timer -= 1
-            if shield_timer <= 0:
-                shield_active = False
-                
-        if slow_active:
-            slow_timer -= 1
-            if slow_timer <= 0:
-                slow_active = False
-                
-        if boost_active:
-            boost_timer -= 1
-            if boost_timer <= 0:
-                boost_active = False
-        
-        # Collision with enemies
-        player_rect = pygame.Rect(player_x, player_y, player_width, player_height)
-        
-        for enemy in enemies[:]:
-            if player_rect.colliderect(enemy.get_rect()):
-                if shield_active:
-                    enemies.remove(enemy)
-                    create_explosion(enemy.x + enemy_width//2, enemy.y + enemy_height//2, BLUE)
-                    score += 20
-                else:
-                    enemies.remove(enemy)
-                    create_explosion(player_x + player_width//2, player_y + player_height//2, RED)
-                    player_lives -= 1
-                    
-                    if player_lives <= 0:
-                        if score > high_score:
-                            high_score = score
-                        game_state = GAME_OVER
-        
-        # Collision with powerups
-        for powerup in powerups[:]:
-            if player_rect.colliderect(powerup.get_rect()):
-                powerups.remove(powerup)
-                create_explosion(powerup.x + powerup.size//2, powerup.y + powerup.size//2, powerup.color)
-                
-                if powerup.type == POWERUP_SHIELD:
-                    shield_active = True
-                    shield_timer = 300
-                elif powerup.type == POWERUP_SLOW:
-                    slow_active = True
-                    slow_timer = 300
-                else:
-                    boost_active = True
-                    boost_timer = 180
-        
-        # Draw everything
-        for enemy in enemies:
-            enemy.draw()
-        
-        for powerup in powerups:
-            powerup.draw()
-        
-        for particle in particles:
-            particle.draw()
-        
-        # Draw player with shield
-        if shield_active:
-            pygame.draw.circle(screen, BLUE, (player_x + player_width//2, player_y + player_height//2), 50, 3)
-        
-        screen.blit(player_img, (player_x, player_y))
-        
-        draw_hud()
-        
-    elif game_state == PAUSED:
-        draw_pause()
-        
-    elif game_state == GAME_OVER:
-        draw_game_over()
-        
-    elif game_state == WINNER:
-        draw_winner()
-    
-    pygame.display.update()
+            if event.key == pygame.K_F3:
+                toggled = not toggled
+            if pipeline is not None:
+                pipeline.send(partial(handle_key, event.key))
+            else:
+                handle_key(event.key)
+    return closed, toggled
+
+def handle_key(key):
+    if state.mode == MENU:
+        if key == pygame.K_RETURN:
+            start_game()
+
+    elif state.mode == PLAYING:
+        if key == pygame.K_p:
+            state.mode = PAUSED
+
+    elif state.mode == PAUSED:
+        if key == pygame.K_p:
+            state.mode = PLAYING
+        if key == pygame.K_ESCAPE:
+            state.mode = MENU
+
+    elif state.mode in (GAME_OVER, WINNER):
+        if key == pygame.K_RETURN:
+            start_game()
+        if key == pygame.K_ESCAPE:
+            state.mode = MENU
+
+def draw_frame(state, dirty=None, alpha=1.0):
+    if state.mode == MENU:
+        draw_menu(state)
+
+    elif state.mode == PLAYING:
+        draw_playing(state, dirty, alpha)
+
+    elif state.mode == PAUSED:
+        draw_pause(state)
+
+    elif state.mode == GAME_OVER:
+        draw_game_over(state)
+
+    elif state.mode == WINNER:
+        draw_winner(state)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Game Mobil Balap 2D")
+    parser.add_argument("--backend", choices=sorted(BACKENDS), default="objects",
+                        help="entity storage: plain objects or NumPy arrays")
+    parser.add_argument("--dirty-rects", action="store_true",
+                        help="during gameplay only update the parts of the screen that changed")
+    parser.add_argument("--fps", type=int, default=FPS,
+                        help="render frame cap, 0 for uncapped (default: %(default)s)")
+    parser.add_argument("--tick-rate", type=int, default=TICK_RATE,
+                        help="simulation ticks per second (default: %(default)s)")
+    parser.add_argument("--profile-out", metavar="FILE",
+                        help="profile from the start and save the frame timings on exit "
+                             "(.csv, anything else is a Chrome trace)")
+    parser.add_argument("--seed", type=int,
+                        help="seed the game so it can be reproduced")
+    parser.add_argument("--record", metavar="FILE",
+                        help="record the seed and every tick's input, replay with replay.py")
+    parser.add_argument("--history", metavar="FILE", default=HISTORY_FILE,
+                        help="SQLite file keeping every finished game and the high score "
+                             "(default: %(default)s)")
+    parser.add_argument("--no-history", action="store_true",
+                        help="do not save finished games")
+    parser.add_argument("--quality", choices=["auto"] + [tier.name for tier in QUALITY_TIERS],
+                        default="auto",
+                        help="effect detail; auto lowers it while frames run over budget "
+                             "(default: %(default)s)")
+    parser.add_argument("--pipelined", action="store_true",
+                        help="simulate on a second thread while the last tick is drawn "
+                             "(check with pipeline.py)")
+    parser.add_argument("--latency", action="store_true",
+                        help="measure the time from each key event to the frame that shows it")
+    parser.add_argument("--low-latency", action="store_true",
+                        help="read the keyboard again right before drawing and draw the car "
+                             "where it is steering")
+    parser.add_argument("--capture", metavar="PATH",
+                        help="save every rendered frame (raw: one RGB24 file, png: a directory)")
+    parser.add_argument("--capture-format", choices=CAPTURE_FORMATS, default="raw",
+                        help="frame capture format (default: %(default)s)")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    global state, recorder, pipeline, live_inputs
+
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(name)s: %(message)s")
+    seed = args.seed
+    if args.record and seed is None:
+        seed = random.SystemRandom().randrange(2 ** 32)
+    state = create_state(args.backend, seed=seed, tick_rate=args.tick_rate)
+    if args.record:
+        recorder = Recorder(seed, args.tick_rate, args.backend)
+    history = None
+    if not args.no_history:
+        try:
+            history = RunHistory(args.history)
+        except sqlite3.Error as e:
+            log.warning("Run history disabled, could not open %s: %s", args.history, e)
+        else:
+            state.history = history
+            state.high_score = history.best_score()
+    capture = None
+    if args.capture:
+        capture = FrameCapture(screen, args.capture, args.capture_format, fps=args.fps)
+    governor = None
+    if args.quality == "auto":
+        governor = QualityGovernor(budget=1.0 / (args.fps or FPS))
+    else:
+        apply_quality(QUALITY_TIERS[find_tier(args.quality)], state)
+    if args.pipelined:
+        pipeline = SimulationThread(state, recorder)
+        pipeline.start()
+    build_atlases()
+    dirty = DirtyRectTracker(screen.get_rect()) if args.dirty_rects else None
+    latency = LatencyTracker() if args.latency else None
+    show_profiler = args.profile_out is not None
+    running = True
+    accumulator = 0.0
+    games_seen = 0
+    frame_start = perf_counter()
+
+    while running:
+        events = None
+        if latency is not None:
+            # Waits out the frame cap itself, stamping key events on arrival
+            if args.fps:
+                events = latency.wait(frame_start + 1.0 / args.fps)
+            else:
+                events = latency.poll()
+
+        # Fixed-timestep loop: run as many ticks as real time has passed,
+        # then render in between the last two ticks
+        frame_time = min(clock.tick(args.fps) / 1000.0, MAX_FRAME_TIME)
+        accumulator += frame_time
+        frame_start = perf_counter()
+
+        # F3 takes effect here so a frame never mixes two profilers
+        if show_profiler != profiler.enabled:
+            set_profiling(show_profiler)
+        profiler.begin_frame()
+        profiler.begin("input")
+
+        closed, toggled = handle_events(events if events is not None else pygame.event.get())
+        if closed:
+            running = False
+        if toggled:
+            show_profiler = not show_profiler
+
+        if assets.poll() and dirty is not None:
+            # A downloaded sprite replaced a placeholder, repaint everything
+            dirty.invalidate()
+
+        inputs = read_inputs()
+        sampled_at = perf_counter()
+        profiler.end("input")
+
+        if pipeline is not None:
+            # The simulation thread ticks on its own; draw its latest snapshot
+            pipeline.inputs = inputs
+            view = pipeline.snapshot
+            if latency is not None:
+                # Ticks scheduled after the inputs were handed over used them
+                latency.sampled(perf_counter())
+                latency.applied(view.time)
+            if view.games != games_seen:
+                games_seen = view.games
+                reset_animations()
+            animate(view, frame_time)
+            alpha = pipeline.alpha(view)
+            if not pipeline.running:
+                running = False
+        else:
+            if latency is not None:
+                latency.sampled(sampled_at)
+                if accumulator >= state.dt:
+                    latency.applied(sampled_at)
+            while accumulator >= state.dt:
+                if recorder is not None:
+                    recorder.record(state.mode, inputs)
+                state.step(inputs)
+                animate(state, state.dt)
+                accumulator -= state.dt
+            view = state
+            alpha = accumulator / state.dt
+
+        if args.low_latency:
+            # Keys that arrived while simulating still make it into this
+            # frame: the car is drawn where the freshest inputs steer it
+            events = latency.poll() if latency is not None else pygame.event.get()
+            closed, toggled = handle_events(events)
+            if closed:
+                running = False
+            if toggled:
+                show_profiler = not show_profiler
+            live_inputs = read_inputs()
+            if pipeline is not None:
+                pipeline.inputs = live_inputs
+            if latency is not None:
+                now = perf_counter()
+                latency.sampled(now)
+                if pipeline is None:
+                    latency.applied(now)
+
+        profiler.begin("draw")
+        allocated = surface_allocations()
+        draw_frame(view, dirty, alpha)
+        profiler.end("draw")
+
+        if profiler.enabled:
+            overlay = draw_profiler_overlay(surface_allocations() - allocated)
+            if dirty is not None and view.mode == PLAYING:
+                dirty.add(overlay)
+
+        profiler.begin("display")
+        if capture is not None:
+            capture.capture()
+        if dirty is not None and view.mode == PLAYING:
+            rects = dirty.flush()
+            if rects is None:
+                pygame.display.update()
+            else:
+                pygame.display.update(rects)
+        else:
+            if dirty is not None:
+                dirty.invalidate()
+            pygame.display.update()
+        profiler.end("display")
+        profiler.end_frame()
+        assets.frame_presented()
+        if latency is not None:
+            latency.presented(perf_counter())
+
+        if governor is not None:
+            tier = governor.update(perf_counter() - frame_start)
+            if tier is not None:
+                apply_quality(tier, state)
+                if dirty is not None:
+                    dirty.invalidate()
+
+    if pipeline is not None:
+        pipeline.stop()
+    if governor is not None:
+        governor.log_summary()
+    if latency is not None:
+        latency.log_summary()
+    if args.profile_out and frame_profiler is not None:
+        frame_profiler.export(args.profile_out)
+    if recorder is not None:
+        recorder.save(args.record, state)
+    if history is not None:
+        history.close()
+    if capture is not None:
+        capture.close()
+
+    pygame.quit()
+    sys.exit()
 
-pygame.quit()
-sys.exit()
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,551 @@
+import random
+from collections import namedtuple
+
+import pygame
+
+from pooling import ObjectPool
+from profiler import NULL_PROFILER
+from spatial import SpatialHash
+
+# ===========================
+# Konstanta
+# ===========================
+WIDTH, HEIGHT = 480, 640
+
+PLAYER_WIDTH, PLAYER_HEIGHT = 50, 100
+ENEMY_WIDTH, ENEMY_HEIGHT = 50, 100
+
+# Road edges (cars stay between the white side lines)
+ROAD_LEFT = 60
+ROAD_RIGHT = WIDTH - 60
+
+# ===========================
+# Timing
+# ===========================
+# The simulation runs at a fixed tick rate. Speeds are in pixels per second
+# and timers in seconds, so gameplay no longer depends on the frame rate.
+TICK_RATE = 60
+# The original tuning counted 60 FPS frames; values below convert from it
+REFERENCE_FPS = 60
+
+SHIELD_DURATION = 300 / REFERENCE_FPS
+SLOW_DURATION = 300 / REFERENCE_FPS
+BOOST_DURATION = 180 / REFERENCE_FPS
+PARTICLE_LIFE = 30 / REFERENCE_FPS
+
+# Spawns retry this many random spots before giving up, to avoid overlaps
+SPAWN_ATTEMPTS = 8
+POWERUP_SIZE = 30
+
+# ===========================
+# Game States
+# ===========================
+MENU = 0
+PLAYING = 1
+GAME_OVER = 2
+PAUSED = 3
+WINNER = 4
+
+# ===========================
+# Warna
+# ===========================
+WHITE = (255, 255, 255)
+BLACK = (0, 0, 0)
+RED = (255, 0, 0)
+GREEN = (0, 255, 0)
+YELLOW = (255, 255, 0)
+BLUE = (0, 150, 255)
+
+# Power-up types
+POWERUP_SHIELD = 0
+POWERUP_SLOW = 1
+POWERUP_BOOST = 2
+
+POWERUP_COLORS = {
+    POWERUP_SHIELD: BLUE,
+    POWERUP_SLOW: YELLOW,
+    POWERUP_BOOST: GREEN,
+}
+
+# Player input for one simulation step
+Inputs = namedtuple("Inputs", ["left", "right"], defaults=[False, False])
+NO_INPUT = Inputs()
+
+# ===========================
+# Classes
+# ===========================
+# Entities use __slots__ and reset() so ObjectPool can recycle them
+class Enemy:
+    __slots__ = ("x", "y", "prev_y", "speed", "serial")
+
+    def __init__(self, x, y, speed, serial):
+        self.reset(x, y, speed, serial)
+
+    def reset(self, x, y, speed, serial):
+        self.x = x
+        self.y = self.prev_y = y
+        self.speed = speed
+        self.serial = serial
+
+    def update(self, dt, slow_active):
+        speed = self.speed * 0.5 if slow_active else self.speed
+        self.prev_y = self.y
+        self.y += speed * dt
+
+    def get_rect(self):
+        return pygame.Rect(self.x, self.y, ENEMY_WIDTH, ENEMY_HEIGHT)
+
+class PowerUp:
+    __slots__ = ("x", "y", "prev_y", "speed", "type", "size", "color", "serial")
+
+    def __init__(self, x, y, powerup_type, serial):
+        self.reset(x, y, powerup_type, serial)
+
+    def reset(self, x, y, powerup_type, serial):
+        self.x = x
+        self.y = self.prev_y = y
+        self.speed = 2 * REFERENCE_FPS
+        self.type = powerup_type
+        self.size = POWERUP_SIZE
+        self.color = POWERUP_COLORS[powerup_type]
+        self.serial = serial
+
+    def update(self, dt):
+        self.prev_y = self.y
+        self.y += self.speed * dt
+
+    def get_rect(self):
+        return pygame.Rect(self.x, self.y, self.size, self.size)
+
+class Particle:
+    __slots__ = ("x", "y", "prev_x", "prev_y", "vx", "vy", "life", "color")
+
+    def __init__(self, rng, x, y, color):
+        self.reset(rng, x, y, color)
+
+    def reset(self, rng, x, y, color):
+        self.x = self.prev_x = x
+        self.y = self.prev_y = y
+        self.vx = rng.randint(-5, 5) * REFERENCE_FPS
+        self.vy = rng.randint(-5, 5) * REFERENCE_FPS
+        self.life = PARTICLE_LIFE
+        self.color = color
+
+    def update(self, dt):
+        self.prev_x, self.prev_y = self.x, self.y
+        self.x += self.vx * dt
+        self.y += self.vy * dt
+        self.life -= dt
+
+def lerp(a, b, alpha):
+    return a + (b - a) * alpha
+
+def steer(x, inputs, distance):
+    # Player x after steering distance pixels, stopping at the road edges
+    if inputs.left and x > ROAD_LEFT:
+        x -= distance
+    if inputs.right and x < ROAD_RIGHT - PLAYER_WIDTH:
+        x += distance
+    return x
+
+def steering_speed(state):
+    return state.player_speed * 1.5 if state.boost_active else state.player_speed
+
+def predict_player_position(state, inputs, alpha=1.0):
+    # Where the next tick takes the car with these inputs, alpha of the way
+    # there. Low-latency drawing uses it instead of player_position(), so a
+    # key shows up in the next frame instead of after a tick and a lerp.
+    # Takes a GameState or a pipeline.StateSnapshot.
+    return steer(state.player_x, inputs, steering_speed(state) * state.dt * alpha), state.player_y
+
+def rects_overlap(ax, ay, aw, ah, bx, by, bw, bh):
+    # pygame.Rect.colliderect on already truncated coordinates
+    return ax < bx + bw and ax + aw > bx and ay < by + bh and ay + ah > by
+
+def entity_size(entity):
+    if isinstance(entity, Enemy):
+        return ENEMY_WIDTH, ENEMY_HEIGHT
+    return POWERUP_SIZE, POWERUP_SIZE
+
+# GameState attributes that may be overridden per game
+DIFFICULTY_FIELDS = (
+    "enemy_cap", "spawn_chance", "spawn_chance_per_level",
+    "enemy_speed_min", "enemy_speed_max", "level_up_score", "max_level",
+)
+
+# ===========================
+# Game state
+# ===========================
+class GameState:
+    # All simulation state of one game session. step() advances one fixed
+    # tick of 1 / tick_rate seconds and never touches the display, so a
+    # session can run headless as fast as the CPU allows.
+
+    # Difficulty curve. Enemy cap is enemy_cap + level, the spawn chance per
+    # 60 FPS frame is spawn_chance + level * spawn_chance_per_level and enemy
+    # speed is a random enemy_speed_min..enemy_speed_max plus the level (in
+    # 60 FPS pixels per frame). Every level_up_score points the level goes
+    # up; finishing max_level wins. Overridden per game for tuner.py.
+    enemy_cap = 5
+    spawn_chance = 0.02
+    spawn_chance_per_level = 0.005
+    enemy_speed_min = 3
+    enemy_speed_max = 5
+    level_up_score = 100
+    max_level = 5
+
+    explosion_particles = 15
+    # Phase timing hooks; the renderer swaps in a FrameProfiler when asked
+    profiler = NULL_PROFILER
+    # Finished games are reported here (a history.RunHistory) when set
+    history = None
+
+    def __init__(self, seed=None, tick_rate=TICK_RATE, difficulty=None):
+        for name, value in (difficulty or {}).items():
+            if name not in DIFFICULTY_FIELDS:
+                raise ValueError(f"Unknown difficulty setting: {name}")
+            setattr(self, name, value)
+
+        self.tick_rate = tick_rate
+        self.dt = 1.0 / tick_rate
+        self.rng = random.Random(seed)
+        # Cosmetic effects use their own stream so they never shift gameplay
+        self.effects_rng = random.Random(seed)
+        self.mode = MENU
+        self.high_score = 0
+
+        self.enemy_pool = ObjectPool(Enemy)
+        self.powerup_pool = ObjectPool(PowerUp)
+        self.particle_pool = ObjectPool(Particle)
+        self.enemies = self.powerups = self.particles = ()
+
+        self.reset()
+
+    def reset(self):
+        self.player_x = WIDTH // 2 - PLAYER_WIDTH // 2
+        self.player_y = HEIGHT - PLAYER_HEIGHT - 20
+        self.prev_player_x = self.player_x
+        self.player_speed = 5 * REFERENCE_FPS
+        self.player_lives = 3
+        self.lives_lost = 0
+        self.powerups_collected = 0
+
+        self.release_entities()
+        self.enemies, self.powerups, self.particles = self.make_containers()
+
+        self.score = 0
+        self.level = 1
+        self.frame = 0
+        # Spawn counter, orders simultaneous collisions deterministically
+        self.spawned = 0
+
+        # Road line animation
+        self.line_offset = 0
+        self.prev_line_offset = 0
+        self.line_speed = 8 * REFERENCE_FPS
+
+        self.shield_active = False
+        self.shield_timer = 0
+        self.slow_active = False
+        self.slow_timer = 0
+        self.boost_active = False
+        self.boost_timer = 0
+
+        for i in range(3):
+            self.add_enemy()
+
+    def start(self):
+        self.reset()
+        self.mode = PLAYING
+
+    # ---------------------------
+    # Entity storage (overridden by the NumPy backend)
+    # ---------------------------
+    def release_entities(self):
+        # Hand the previous game's entities back to the pools
+        self.enemy_pool.release_all(self.enemies)
+        self.powerup_pool.release_all(self.powerups)
+        self.particle_pool.release_all(self.particles)
+
+    def pool_stats(self):
+        return {
+            "enemies": self.enemy_pool.stats(),
+            "powerups": self.powerup_pool.stats(),
+            "particles": self.particle_pool.stats(),
+        }
+
+    def make_containers(self):
+        # Enemies and power-ups are also indexed in a grid for collision
+        # and spawn-overlap queries
+        self.grid = SpatialHash()
+        return [], [], []
+
+    def insert_enemy(self, x, y, speed):
+        enemy = self.enemy_pool.acquire(x, y, speed, self.spawned)
+        self.enemies.append(enemy)
+        self.grid.insert(enemy, x, y, ENEMY_WIDTH, ENEMY_HEIGHT)
+
+    def insert_powerup(self, x, y, powerup_type):
+        powerup = self.powerup_pool.acquire(x, y, powerup_type, self.spawned)
+        self.powerups.append(powerup)
+        self.grid.insert(powerup, x, y, POWERUP_SIZE, POWERUP_SIZE)
+
+    def spawn_area_free(self, x, y, w, h):
+        for other in self.grid.query(x, y, w, h):
+            if rects_overlap(x, y, w, h, int(other.x), int(other.y),
+                             *entity_size(other)):
+                return False
+        return True
+
+    # ---------------------------
+    # Spawning
+    # ---------------------------
+    def find_spawn_spot(self, w, h, top, bottom):
+        # Random spot above the screen that does not overlap another car or
+        # power-up, or None when every attempt was taken
+        for _ in range(SPAWN_ATTEMPTS):
+            x = self.rng.randint(ROAD_LEFT, ROAD_RIGHT - w)
+            y = self.rng.randint(top, bottom)
+            if self.spawn_area_free(x, y, w, h):
+                return x, y
+        return None
+
+    def add_enemy(self):
+        spot = self.find_spawn_spot(ENEMY_WIDTH, ENEMY_HEIGHT, -600, -ENEMY_HEIGHT)
+        if spot is not None:
+            self.spawned += 1
+            speed = (self.rng.randint(self.enemy_speed_min, self.enemy_speed_max) + self.level) * REFERENCE_FPS
+            self.insert_enemy(spot[0], spot[1], speed)
+
+    def add_powerup(self, powerup_type):
+        spot = self.find_spawn_spot(POWERUP_SIZE, POWERUP_SIZE, -400, -POWERUP_SIZE)
+        if spot is not None:
+            self.spawned += 1
+            self.insert_powerup(spot[0], spot[1], powerup_type)
+
+    def spawn_enemy(self):
+        if len(self.enemies) < self.enemy_cap + self.level:
+            chance = self.spawn_chance + self.level * self.spawn_chance_per_level
+            if self.rng.random() < chance * self.frame_scale():
+                self.add_enemy()
+
+    def spawn_powerup(self):
+        if len(self.powerups) < 2:
+            if self.rng.random() < 0.005 * self.frame_scale():
+                self.add_powerup(self.rng.randint(0, 2))
+
+    def frame_scale(self):
+        # Per-frame chances were tuned for 60 FPS; scale them to one tick
+        return self.dt * REFERENCE_FPS
+
+    def create_explosion(self, x, y, color):
+        acquire = self.particle_pool.acquire
+        for _ in range(self.explosion_particles):
+            self.particles.append(acquire(self.effects_rng, x, y, color))
+
+    # ---------------------------
+    # Read access for renderers
+    # ---------------------------
+    # alpha in [0, 1] blends between the previous and the current tick so
+    # frames rendered between ticks move smoothly.
+    def player_position(self, alpha=1.0):
+        return lerp(self.prev_player_x, self.player_x, alpha), self.player_y
+
+    def road_offset(self, alpha=1.0):
+        current = self.line_offset
+        if current < self.prev_line_offset:
+            current += 80  # wrapped around during the last tick
+        return lerp(self.prev_line_offset, current, alpha) % 80
+
+    def enemy_positions(self, alpha=1.0):
+        return [(enemy.x, lerp(enemy.prev_y, enemy.y, alpha)) for enemy in self.enemies]
+
+    def powerup_items(self, alpha=1.0):
+        return [(powerup.x, lerp(powerup.prev_y, powerup.y, alpha), powerup.type)
+                for powerup in self.powerups]
+
+    def particle_items(self, alpha=1.0):
+        return [(lerp(particle.prev_x, particle.x, alpha), lerp(particle.prev_y, particle.y, alpha),
+                 particle.color) for particle in self.particles]
+
+    def entity_rows(self):
+        # Previous and current coordinates of every entity as plain tuples,
+        # a copy that later ticks do not change (see pipeline.StateSnapshot):
+        # enemies (x, prev_y, y), power-ups (x, prev_y, y, type) and
+        # particles (prev_x, x, prev_y, y, color)
+        return ([(enemy.x, enemy.prev_y, enemy.y) for enemy in self.enemies],
+                [(powerup.x, powerup.prev_y, powerup.y, powerup.type) for powerup in self.powerups],
+                [(particle.prev_x, particle.x, particle.prev_y, particle.y, particle.color)
+                 for particle in self.particles])
+
+    # ---------------------------
+    # Simulation step
+    # ---------------------------
+    def step(self, inputs=NO_INPUT):
+        if self.mode != PLAYING:
+            return
+
+        self.frame += 1
+
+        # Animated center dashed lines
+        self.prev_line_offset = self.line_offset
+        self.line_offset = (self.line_offset + self.line_speed * self.dt) % 80
+
+        profiler = self.profiler
+        self.update_player(inputs)
+
+        profiler.begin("spawn")
+        self.spawn_enemy()
+        self.spawn_powerup()
+        profiler.end("spawn")
+
+        profiler.begin("update")
+        self.update_entities()
+        self.update_timers()
+        profiler.end("update")
+
+        profiler.begin("collision")
+        self.check_collisions()
+        profiler.end("collision")
+
+        if self.mode != PLAYING and self.history is not None:
+            self.history.record(self.run_result())
+
+    def update_player(self, inputs):
+        self.prev_player_x = self.player_x
+        self.player_x = steer(self.player_x, inputs, steering_speed(self) * self.dt)
+
+    def update_entities(self):
+        # Each list is rebuilt in one pass; removed entities go back to
+        # their pool instead of being garbage collected
+        grid = self.grid
+
+        enemies = []
+        for enemy in self.enemies:
+            enemy.update(self.dt, self.slow_active)
+            if enemy.y <= HEIGHT:
+                grid.move(enemy, enemy.x, enemy.y, ENEMY_WIDTH, ENEMY_HEIGHT)
+                enemies.append(enemy)
+            else:
+                grid.remove(enemy)
+                self.enemy_pool.release(enemy)
+                self.enemy_passed()
+        self.enemies = enemies
+
+        powerups = []
+        for powerup in self.powerups:
+            powerup.update(self.dt)
+            if powerup.y <= HEIGHT:
+                grid.move(powerup, powerup.x, powerup.y, POWERUP_SIZE, POWERUP_SIZE)
+                powerups.append(powerup)
+            else:
+                grid.remove(powerup)
+                self.powerup_pool.release(powerup)
+        self.powerups = powerups
+
+        particles = []
+        for particle in self.particles:
+            particle.update(self.dt)
+            if particle.life > 0:
+                particles.append(particle)
+            else:
+                self.particle_pool.release(particle)
+        self.particles = particles
+
+    def enemy_passed(self):
+        self.score += 10
+
+        # Check for level up (max level 5 by default)
+        if self.score % self.level_up_score == 0 and self.level < self.max_level:
+            self.level += 1
+
+        # Check for winner (completed the last level)
+        if self.level >= self.max_level and self.score >= self.max_level * self.level_up_score:
+            self.finish(WINNER)
+
+    def update_timers(self):
+        if self.shield_active:
+            self.shield_timer -= self.dt
+            if self.shield_timer <= 0:
+                self.shield_active = False
+
+        if self.slow_active:
+            self.slow_timer -= self.dt
+            if self.slow_timer <= 0:
+                self.slow_active = False
+
+        if self.boost_active:
+            self.boost_timer -= self.dt
+            if self.boost_timer <= 0:
+                self.boost_active = False
+
+    def player_rect(self):
+        return pygame.Rect(self.player_x, self.player_y, PLAYER_WIDTH, PLAYER_HEIGHT)
+
+    def check_collisions(self):
+        # Broad phase: only entities in the grid cells under the player
+        px, py = int(self.player_x), int(self.player_y)
+        hits = [other for other in self.grid.query(px, py, PLAYER_WIDTH, PLAYER_HEIGHT)
+                if rects_overlap(px, py, PLAYER_WIDTH, PLAYER_HEIGHT,
+                                 int(other.x), int(other.y), *entity_size(other))]
+        if not hits:
+            return
+
+        # Enemies first, then power-ups, each in spawn order
+        hits.sort(key=lambda other: (isinstance(other, PowerUp), other.serial))
+        for other in hits:
+            self.grid.remove(other)
+            if isinstance(other, Enemy):
+                self.enemies.remove(other)
+                self.hit_enemy(other.x, other.y)
+                self.enemy_pool.release(other)
+            else:
+                self.powerups.remove(other)
+                self.collect_powerup(other.x, other.y, other.type)
+                self.powerup_pool.release(other)
+
+    def hit_enemy(self, x, y):
+        if self.shield_active:
+            self.create_explosion(x + ENEMY_WIDTH // 2, y + ENEMY_HEIGHT // 2, BLUE)
+            self.score += 20
+        else:
+            self.create_explosion(self.player_x + PLAYER_WIDTH // 2,
+                                  self.player_y + PLAYER_HEIGHT // 2, RED)
+            self.player_lives -= 1
+            self.lives_lost += 1
+
+            if self.player_lives <= 0:
+                self.finish(GAME_OVER)
+
+    def collect_powerup(self, x, y, powerup_type):
+        self.create_explosion(x + 15, y + 15, POWERUP_COLORS[powerup_type])
+        self.powerups_collected += 1
+
+        if powerup_type == POWERUP_SHIELD:
+            self.shield_active = True
+            self.shield_timer = SHIELD_DURATION
+        elif powerup_type == POWERUP_SLOW:
+            self.slow_active = True
+            self.slow_timer = SLOW_DURATION
+        else:
+            self.boost_active = True
+            self.boost_timer = BOOST_DURATION
+
+    def finish(self, mode):
+        # May run several times in one tick (two crashes, or the winning
+        # pass and a crash); the last call decides, a crash after the win
+        # still ends as GAME_OVER. step() records the game once at the end.
+        if self.score > self.high_score:
+            self.high_score = self.score
+        self.mode = mode
+
+    def run_result(self):
+        # What the run history keeps of a finished game
+        return {
+            "score": self.score,
+            "level": self.level,
+            "lives_lost": self.lives_lost,
+            "powerups": self.powerups_collected,
+            "duration": self.frame * self.dt,
+            "won": self.mode == WINNER,
+        }
@@ -0,0 +1,200 @@
+import argparse
+import logging
+import queue
+import sqlite3
+import threading
+import time
+
+# Default database next to where the game is started
+HISTORY_FILE = "race_history.db"
+# Rows written per transaction at most, the writer drains the queue in batches
+WRITE_BATCH = 1000
+
+log = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    finished_at REAL NOT NULL,
+    day TEXT NOT NULL,
+    source TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    level INTEGER NOT NULL,
+    lives_lost INTEGER NOT NULL,
+    powerups INTEGER NOT NULL,
+    duration REAL NOT NULL,
+    won INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS runs_source_score ON runs (source, score DESC, finished_at);
+CREATE INDEX IF NOT EXISTS runs_source_day_score ON runs (source, day, score DESC, finished_at);
+CREATE TABLE IF NOT EXISTS days (
+    source TEXT NOT NULL,
+    day TEXT NOT NULL,
+    games INTEGER NOT NULL,
+    best INTEGER NOT NULL,
+    total_score INTEGER NOT NULL,
+    wins INTEGER NOT NULL,
+    PRIMARY KEY (source, day)
+) WITHOUT ROWID;
+"""
+
+COLUMNS = ("finished_at", "day", "source", "score", "level",
+           "lives_lost", "powerups", "duration", "won")
+# What summary_of() takes from a days row
+DAY_COLUMNS = "day, games, best, total_score, wins"
+
+def connect(path):
+    # WAL lets the reader connection query while the writer commits
+    connection = sqlite3.connect(path, timeout=30)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    connection.executescript(SCHEMA)
+    return connection
+
+def day_of(timestamp):
+    # Local calendar day, so "today" matches the cabinet's clock
+    return time.strftime("%Y-%m-%d", time.localtime(timestamp))
+
+def day_totals(rows):
+    # (source, day, games, best, total score, wins) for a batch of run rows
+    totals = {}
+    for row in rows:
+        key, score, won = (row[2], row[1]), row[3], row[8]
+        games, best, total, wins = totals.get(key, (0, 0, 0, 0))
+        totals[key] = (games + 1, max(best, score), total + score, wins + won)
+    return [key + values for key, values in totals.items()]
+
+def summary_of(row):
+    day, games, best, total_score, wins = row
+    return {"day": day, "games": games, "best": best,
+            "average": total_score / games if games else 0.0, "wins": wins}
+
+# ===========================
+# Run history
+# ===========================
+class RunHistory:
+    # Every finished game as one row in SQLite. record() only puts the
+    # result on a queue; a background thread owns the write connection and
+    # commits whatever has piled up in one transaction, so the frame loop
+    # never waits for the disk. Queries use a separate read connection and
+    # only touch indexes or the per-day totals, so they stay fast at
+    # millions of rows.
+
+    def __init__(self, path=HISTORY_FILE, source="game"):
+        self.path = path
+        self.source = source
+        self.pending = queue.SimpleQueue()
+        self.reader = connect(path)
+        self.written = 0
+        self.thread = threading.Thread(target=self._write, name="run-history", daemon=True)
+        self.thread.start()
+
+    def record(self, result):
+        # result as returned by GameState.run_result(); never blocks
+        self.pending.put((time.time(), result))
+
+    def close(self):
+        # Waits until every recorded run is on disk
+        self.pending.put(None)
+        self.thread.join()
+        self.reader.close()
+
+    def _write(self):
+        connection = connect(self.path)
+        running = True
+        while running:
+            batch = [self.pending.get()]
+            while len(batch) < WRITE_BATCH:
+                try:
+                    batch.append(self.pending.get_nowait())
+                except queue.Empty:
+                    break
+            if None in batch:
+                running = False
+                batch = [item for item in batch if item is not None]
+
+            rows = [(finished_at, day_of(finished_at), result.get("source", self.source),
+                     result["score"], result["level"], result["lives_lost"],
+                     result["powerups"], result["duration"], int(result["won"]))
+                    for finished_at, result in batch]
+            try:
+                with connection:
+                    connection.executemany(
+                        f"INSERT INTO runs ({', '.join(COLUMNS)}) "
+                        f"VALUES ({', '.join('?' * len(COLUMNS))})", rows)
+                    connection.executemany(
+                        "INSERT INTO days VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (source, day) DO UPDATE SET "
+                        "games = games + excluded.games, best = MAX(best, excluded.best), "
+                        "total_score = total_score + excluded.total_score, "
+                        "wins = wins + excluded.wins", day_totals(rows))
+                self.written += len(rows)
+            except sqlite3.Error:
+                log.exception("Could not save %d runs to %s", len(rows), self.path)
+        connection.close()
+
+    # ---------------------------
+    # Queries
+    # ---------------------------
+    # Every query covers one source (default: this instance's), so tuner
+    # runs sharing the file never show up as the player's games
+    def best_score(self, source=None):
+        row = self.reader.execute("SELECT MAX(score) FROM runs WHERE source = ?",
+                                  (source or self.source,)).fetchone()
+        return row[0] or 0
+
+    def top(self, count=10, day=None, source=None):
+        # Highest scores, all time or of one day ("YYYY-MM-DD"), served
+        # from the score indexes without scanning the table
+        query = f"SELECT {', '.join(COLUMNS)} FROM runs WHERE source = ?"
+        params = (source or self.source,)
+        if day is not None:
+            query += " AND day = ?"
+            params += (day,)
+        query += " ORDER BY score DESC, finished_at LIMIT ?"
+        cursor = self.reader.execute(query, params + (count,))
+        return [dict(zip(COLUMNS, row)) for row in cursor]
+
+    def day_summary(self, day, source=None):
+        row = self.reader.execute(f"SELECT {DAY_COLUMNS} FROM days WHERE source = ? AND day = ?",
+                                  (source or self.source, day)).fetchone()
+        return summary_of(row or (day, 0, 0, 0, 0))
+
+    def recent_days(self, count=7, source=None):
+        # Summaries of the last days that have games, newest first
+        cursor = self.reader.execute(
+            f"SELECT {DAY_COLUMNS} FROM days WHERE source = ? ORDER BY day DESC LIMIT ?",
+            (source or self.source, count))
+        return [summary_of(row) for row in cursor]
+
+# ===========================
+# Command line
+# ===========================
+def print_runs(runs):
+    print(f"{'#':>3} {'score':>6} {'level':>5} {'lost':>4} {'items':>5} {'time s':>7}  finished")
+    for rank, run in enumerate(runs, 1):
+        finished = time.strftime("%Y-%m-%d %H:%M", time.localtime(run["finished_at"]))
+        print(f"{rank:>3} {run['score']:>6} {run['level']:>5} {run['lives_lost']:>4} "
+              f"{run['powerups']:>5} {run['duration']:>7.1f}  {finished} {run['source']}")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Leaderboard and run history")
+    parser.add_argument("database", nargs="?", default=HISTORY_FILE)
+    parser.add_argument("--top", type=int, default=10, help="how many runs to list")
+    parser.add_argument("--day", help="only runs of this day (YYYY-MM-DD, or 'today')")
+    parser.add_argument("--source", default="game",
+                        help="whose runs to list: game or tuner (default: %(default)s)")
+    parser.add_argument("--days", type=int, default=0, help="also summarize the last N days")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    day = day_of(time.time()) if args.day == "today" else args.day
+    history = RunHistory(args.database, source=args.source)
+    print_runs(history.top(args.top, day))
+    for summary in history.recent_days(args.days) if args.days else ():
+        print(f"{summary['day']}  {summary['games']:>7} games  best {summary['best']:>5}  "
+              f"average {summary['average']:>7.1f}  wins {summary['wins']}")
+    history.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+import logging
+from time import perf_counter
+
+import pygame
+
+from profiler import percentile
+
+log = logging.getLogger(__name__)
+
+# Key events whose latency is measured
+KEY_EVENTS = (pygame.KEYDOWN, pygame.KEYUP)
+
+# ===========================
+# Input latency
+# ===========================
+class LatencyTracker:
+    # Time from each KEYDOWN/KEYUP to the display update that first shows
+    # its effect. An event moves through three steps:
+    #   stamp()     when it comes off the SDL queue, see wait()
+    #   sampled()   the keyboard state that includes it was read
+    #   applied()   that keyboard state reached what is being drawn, i.e. a
+    #               tick consumed it, or the low-latency draw predicted it
+    # and presented() after the display update records its latency.
+    # A tick changes the frame drawn right after it, so this also covers
+    # pause and start keys, which take effect before the tick.
+
+    def __init__(self):
+        self.waiting = []
+        self.batches = []  # (sample time, [event times])
+        self.shown = []
+        self.latencies = []
+
+    def wait(self, deadline):
+        # Sleeps until deadline (perf_counter seconds) like Clock.tick, but
+        # takes events off the queue as they arrive, so each key event is
+        # stamped within a millisecond instead of when the frame polls
+        events = []
+        while True:
+            remaining = deadline - perf_counter()
+            if remaining <= 0:
+                break
+            event = pygame.event.wait(max(1, int(remaining * 1000)))
+            if event.type != pygame.NOEVENT:
+                self.stamp(event)
+                events.append(event)
+        return events + self.poll()
+
+    def poll(self):
+        # pygame.event.get() with every key event stamped
+        events = pygame.event.get()
+        for event in events:
+            self.stamp(event)
+        return events
+
+    def stamp(self, event):
+        if event.type in KEY_EVENTS:
+            self.waiting.append(perf_counter())
+
+    def sampled(self, now):
+        if self.waiting:
+            self.batches.append((now, self.waiting))
+            self.waiting = []
+
+    def applied(self, upto):
+        # Everything sampled at or before upto is now part of the frame
+        while self.batches and self.batches[0][0] <= upto:
+            self.shown.extend(self.batches.pop(0)[1])
+
+    def presented(self, now):
+        for stamped in self.shown:
+            self.latencies.append(now - stamped)
+        self.shown.clear()
+
+    def summary(self):
+        values = sorted(self.latencies)
+        if not values:
+            return {"events": 0}
+        return {
+            "events": len(values),
+            "p50_ms": percentile(values, 50) * 1000,
+            "p95_ms": percentile(values, 95) * 1000,
+            "p99_ms": percentile(values, 99) * 1000,
+            "max_ms": values[-1] * 1000,
+        }
+
+    def log_summary(self):
+        summary = self.summary()
+        if not summary["events"]:
+            log.info("No key events measured")
+            return
+        log.info("Input to display latency over %d key events: p50 %.1f ms, p95 %.1f ms, "
+                 "p99 %.1f ms, max %.1f ms", summary["events"], summary["p50_ms"],
+                 summary["p95_ms"], summary["p99_ms"], summary["max_ms"])
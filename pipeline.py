@@ -0,0 +1,247 @@
+import argparse
+import hashlib
+import logging
+import queue
+import random
+import sys
+import threading
+import time
+from functools import partial
+from time import perf_counter
+
+from entity_engine import BACKENDS, create_state
+from game_state import Inputs, NO_INPUT, PLAYING, TICK_RATE, lerp
+from replay import Recorder, apply_tick, outcome, run_headless
+
+# Longest stall the simulation catches up on, like MAX_FRAME_TIME in the game
+MAX_LAG = 0.25
+
+log = logging.getLogger(__name__)
+
+# ===========================
+# Snapshot
+# ===========================
+# Scalars the renderer reads, copied from the state as they are
+SCALARS = (
+    "mode", "score", "level", "player_lives", "high_score", "frame", "dt",
+    "shield_active", "shield_timer", "slow_active", "slow_timer", "boost_active", "boost_timer",
+    "prev_player_x", "player_x", "player_y", "player_speed", "prev_line_offset", "line_offset",
+)
+
+class StateSnapshot:
+    # Everything the renderer needs from one tick, copied out of the state
+    # into tuples and never changed afterwards. It has the same read
+    # methods as GameState, so draw_frame() takes either one, and the same
+    # lerps give the same pixels.
+
+    __slots__ = SCALARS + ("enemies", "powerups", "particles", "tick", "games", "time")
+
+    def __init__(self, state, tick=0, games=0, time=0.0):
+        for name in SCALARS:
+            setattr(self, name, getattr(state, name))
+        self.enemies, self.powerups, self.particles = state.entity_rows()
+        self.tick = tick
+        self.games = games
+        self.time = time
+
+    def values(self):
+        # What has to match between pipelined and single-threaded runs
+        return tuple(getattr(self, name) for name in SCALARS) + (
+            self.enemies, self.powerups, self.particles)
+
+    def player_position(self, alpha=1.0):
+        return lerp(self.prev_player_x, self.player_x, alpha), self.player_y
+
+    def road_offset(self, alpha=1.0):
+        current = self.line_offset
+        if current < self.prev_line_offset:
+            current += 80  # wrapped around during the last tick
+        return lerp(self.prev_line_offset, current, alpha) % 80
+
+    def enemy_positions(self, alpha=1.0):
+        return [(x, lerp(prev_y, y, alpha)) for x, prev_y, y in self.enemies]
+
+    def powerup_items(self, alpha=1.0):
+        return [(x, lerp(prev_y, y, alpha), kind) for x, prev_y, y, kind in self.powerups]
+
+    def particle_items(self, alpha=1.0):
+        return [(lerp(prev_x, x, alpha), lerp(prev_y, y, alpha), color)
+                for prev_x, x, prev_y, y, color in self.particles]
+
+# ===========================
+# Simulation thread
+# ===========================
+class SimulationThread:
+    # Runs the fixed-tick simulation on its own thread while the main
+    # thread draws. After every tick a new StateSnapshot is published by
+    # assigning self.snapshot; the renderer keeps drawing the one it took
+    # while the next is built, so there are two buffers in flight and no
+    # lock: a reference assignment is atomic, and a published snapshot is
+    # never written again. The renderer talks back the same way, through
+    # self.inputs (read at every tick) and send() for anything that
+    # changes the state, which then runs on this thread between two ticks.
+    # Only this thread touches the state and the recorder after start().
+
+    def __init__(self, state, recorder=None):
+        self.state = state
+        self.recorder = recorder
+        self.inputs = NO_INPUT
+        self.commands = queue.SimpleQueue()
+        self.ticks = 0
+        # Games started so far; the renderer resets its animations on change
+        self.games = 0
+        self.work = 0.0
+        self.snapshot = StateSnapshot(state, time=perf_counter())
+        self.running = False
+        self.thread = threading.Thread(target=self._run, name="simulation", daemon=True)
+
+    def start(self):
+        self.running = True
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        self.thread.join()
+
+    def send(self, command):
+        # command() runs on the simulation thread before the next tick
+        self.commands.put(command)
+
+    def alpha(self, snapshot, now=None):
+        # How far real time is past the snapshot's tick, for interpolation
+        if now is None:
+            now = perf_counter()
+        return min(max((now - snapshot.time) / self.state.dt, 0.0), 1.0)
+
+    def tick(self, inputs, now):
+        start = perf_counter()
+        state = self.state
+        while True:
+            try:
+                command = self.commands.get_nowait()
+            except queue.Empty:
+                break
+            command()
+        if self.recorder is not None:
+            self.recorder.record(state.mode, inputs)
+        state.step(inputs)
+        self.ticks += 1
+        self.snapshot = StateSnapshot(state, self.ticks, self.games, now)
+        self.work += perf_counter() - start
+
+    def _run(self):
+        dt = self.state.dt
+        next_tick = perf_counter()
+        try:
+            while self.running:
+                now = perf_counter()
+                if now < next_tick:
+                    time.sleep(next_tick - now)
+                    continue
+                if now - next_tick > MAX_LAG:
+                    next_tick = now  # Skip a stall instead of a burst of ticks
+                self.tick(self.inputs, next_tick)
+                next_tick += dt
+        finally:
+            # Lets the render loop notice when this thread died
+            self.running = False
+
+# ===========================
+# Determinism check
+# ===========================
+def frame_digest(screen):
+    return hashlib.blake2b(screen.get_view("0").raw, digest_size=16).digest()
+
+def run_pipelined(game, state, recorder, seconds, seed, sample_every=5):
+    # Plays with random keys, drawing uncapped from the snapshots, and
+    # keeps (tick, alpha, digest) of every sample_every-th gameplay frame.
+    # Which tick gets which input depends on thread timing, so everything
+    # is recorded and checked afterwards.
+    import pygame
+
+    rng = random.Random(seed)
+    sim = SimulationThread(state, recorder)
+    game.state, game.recorder, game.pipeline = state, recorder, sim
+    samples = []
+    frames = 0
+    games_seen = 0
+    inputs = NO_INPUT
+    sim.start()
+    end = perf_counter() + seconds
+    while perf_counter() < end and sim.running:
+        pygame.event.pump()
+        view = sim.snapshot
+        if view.games != games_seen:
+            games_seen = view.games
+            game.reset_animations()
+        if view.mode != PLAYING and frames % 30 == 0:
+            sim.send(partial(game.handle_key, pygame.K_RETURN))
+        if frames % 10 == 0:
+            inputs = Inputs(left=rng.random() < 0.4, right=rng.random() < 0.4)
+        sim.inputs = inputs
+
+        alpha = sim.alpha(view)
+        game.draw_frame(view, None, alpha)
+        if view.mode == PLAYING and frames % sample_every == 0:
+            samples.append((view.tick, alpha, frame_digest(game.screen)))
+        pygame.display.update()
+        frames += 1
+    sim.stop()
+    game.pipeline = None
+    return sim, samples, frames
+
+def check(backend, seed, seconds, tick_rate):
+    # Pipelined play, then the recording replayed on one thread: every
+    # sampled frame has to be drawn with the same pixels from the state at
+    # the same tick, and the game has to end the same way
+    import game_mobil_balap as game
+
+    state = create_state(backend, seed=seed, tick_rate=tick_rate)
+    recorder = Recorder(seed, tick_rate, backend)
+    sim, samples, frames = run_pipelined(game, state, recorder, seconds, seed)
+    log.info("Pipelined: %d ticks, %d games, %d frames drawn (%.0f FPS), %.3f ms simulation per tick",
+             sim.ticks, sim.games, frames, frames / seconds, sim.work / max(sim.ticks, 1) * 1000)
+
+    header = {"seed": seed, "tick_rate": tick_rate, "backend": backend}
+    replayed = create_state(backend, seed=seed, tick_rate=tick_rate)
+    game.state = replayed
+    wanted = {}
+    for tick, alpha, digest in samples:
+        wanted.setdefault(tick, []).append((alpha, digest))
+    mismatches = 0
+    for tick, flags in enumerate(recorder.ticks, 1):
+        replayed.step(apply_tick(replayed, flags))
+        for alpha, digest in wanted.get(tick, ()):
+            game.draw_frame(replayed, None, alpha)
+            if frame_digest(game.screen) != digest:
+                mismatches += 1
+                log.error("Frame at tick %d (alpha %.3f) differs from single-threaded", tick, alpha)
+
+    same_state = StateSnapshot(replayed).values() == StateSnapshot(state).values()
+    headless = outcome(run_headless(header, recorder.ticks))
+    same_outcome = outcome(state) == outcome(replayed) == headless
+    log.info("Compared %d frames: %d differ; final state %s, outcome %s (%s)",
+             len(samples), mismatches, "matches" if same_state else "DIFFERS",
+             "matches" if same_outcome else "DIFFERS", headless)
+    return mismatches == 0 and same_state and same_outcome
+
+# ===========================
+# Command line
+# ===========================
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Check that pipelined simulation draws the same as single-threaded")
+    parser.add_argument("--backend", choices=sorted(BACKENDS), default="objects")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--tick-rate", type=int, default=TICK_RATE)
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(name)s: %(message)s")
+    ok = check(args.backend, args.seed, args.seconds, args.tick_rate)
+    sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+# ===========================
+# Object pool
+# ===========================
+class ObjectPool:
+    # Recycles short-lived objects (particles, enemies, confetti) instead of
+    # allocating new ones and leaving the old ones to the garbage collector.
+    # Pooled classes implement reset(*args) with the same arguments as
+    # their constructor.
+
+    def __init__(self, cls, max_size=4096):
+        self.cls = cls
+        self.max_size = max_size
+        self.free = []
+        self.created = 0
+        self.reused = 0
+        self.released = 0
+
+    def acquire(self, *args):
+        if self.free:
+            obj = self.free.pop()
+            obj.reset(*args)
+            self.reused += 1
+            return obj
+
+        self.created += 1
+        return self.cls(*args)
+
+    def release(self, obj):
+        self.released += 1
+        if len(self.free) < self.max_size:
+            self.free.append(obj)
+
+    def release_all(self, objs):
+        for obj in objs:
+            self.release(obj)
+
+    def stats(self):
+        acquired = self.created + self.reused
+        return {
+            "created": self.created,
+            "reused": self.reused,
+            "free": len(self.free),
+            "reuse_rate": self.reused / acquired if acquired else 0.0,
+        }
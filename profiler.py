@@ -0,0 +1,134 @@
+import csv
+import json
+from time import perf_counter
+
+# Main loop phases, in the order they run
+PHASES = ("input", "spawn", "update", "collision", "draw", "hud", "display")
+
+# ===========================
+# Null profiler
+# ===========================
+class NullProfiler:
+    # Used while profiling is off; every hook is an empty method so the
+    # instrumented code pays one call and nothing else
+    enabled = False
+
+    def begin_frame(self):
+        pass
+
+    def end_frame(self):
+        pass
+
+    def begin(self, phase):
+        pass
+
+    def end(self, phase):
+        pass
+
+NULL_PROFILER = NullProfiler()
+
+def percentile(sorted_values, pct):
+    # Nearest-rank percentile
+    index = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+# ===========================
+# Frame profiler
+# ===========================
+class FrameProfiler:
+    # Times each main loop phase per frame into a fixed-size ring buffer.
+    # A phase may run several times in one frame (several ticks, or draw
+    # split around the HUD); its durations are summed for that frame.
+    enabled = True
+
+    def __init__(self, capacity=600):
+        self.capacity = capacity
+        self.index = {phase: i for i, phase in enumerate(PHASES)}
+        phases = len(PHASES)
+        # Row layout: frame start, frame total, phase durations, then the
+        # offset of each phase's first start within the frame (for traces)
+        self.rows = [[0.0] * (2 + 2 * phases) for _ in range(capacity)]
+        self.frames = 0
+        self.durations = [0.0] * phases
+        self.offsets = [-1.0] * phases
+        self.started = [0.0] * phases
+        self.frame_start = 0.0
+
+    def begin_frame(self):
+        self.frame_start = perf_counter()
+        for i in range(len(PHASES)):
+            self.durations[i] = 0.0
+            self.offsets[i] = -1.0
+
+    def begin(self, phase):
+        now = perf_counter()
+        i = self.index[phase]
+        self.started[i] = now
+        if self.offsets[i] < 0:
+            self.offsets[i] = now - self.frame_start
+
+    def end(self, phase):
+        i = self.index[phase]
+        self.durations[i] += perf_counter() - self.started[i]
+
+    def end_frame(self):
+        row = self.rows[self.frames % self.capacity]
+        row[0] = self.frame_start
+        row[1] = perf_counter() - self.frame_start
+        phases = len(PHASES)
+        row[2:2 + phases] = self.durations
+        row[2 + phases:] = self.offsets
+        self.frames += 1
+
+    def __len__(self):
+        return min(self.frames, self.capacity)
+
+    def recent(self, count=None):
+        # Rows oldest first, at most count of them
+        count = len(self) if count is None else min(count, len(self))
+        first = self.frames - count
+        return [self.rows[i % self.capacity] for i in range(first, self.frames)]
+
+    def averages(self, count=60):
+        # Mean seconds per phase (and "frame" for the total) over recent frames
+        rows = self.recent(count)
+        if not rows:
+            return {}
+        result = {"frame": sum(row[1] for row in rows) / len(rows)}
+        for phase, i in self.index.items():
+            result[phase] = sum(row[2 + i] for row in rows) / len(rows)
+        return result
+
+    # ---------------------------
+    # Export
+    # ---------------------------
+    def export_csv(self, path):
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["frame", "total_ms"] + [f"{phase}_ms" for phase in PHASES])
+            first = self.frames - len(self)
+            for n, row in enumerate(self.recent(), first):
+                writer.writerow([n] + [f"{value * 1000:.4f}" for value in row[1:2 + len(PHASES)]])
+
+    def export_chrome_trace(self, path):
+        # Trace Event Format, open in chrome://tracing or ui.perfetto.dev.
+        # Repeated phases are shown as one span starting at their first run.
+        events = []
+        phases = len(PHASES)
+        for row in self.recent():
+            start = row[0] * 1e6
+            events.append({"name": "frame", "ph": "X", "pid": 0, "tid": 0,
+                           "ts": start, "dur": row[1] * 1e6})
+            for phase, i in self.index.items():
+                offset = row[2 + phases + i]
+                if offset >= 0:
+                    events.append({"name": phase, "ph": "X", "pid": 0, "tid": 1,
+                                   "ts": start + offset * 1e6, "dur": row[2 + i] * 1e6})
+        with open(path, "w") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+    def export(self, path):
+        if path.endswith(".csv"):
+            self.export_csv(path)
+        else:
+            self.export_chrome_trace(path)
@@ -0,0 +1,102 @@
+import logging
+from collections import deque, namedtuple
+
+log = logging.getLogger(__name__)
+
+# ===========================
+# Quality tiers
+# ===========================
+# explosion_particles: particles per create_explosion (cosmetic only)
+# shadow_passes: offset copies drawn behind the title and WINNER texts
+# confetti_cap: most confetti pieces alive on the winner screen
+# road_detail: scrolling center lines and the gradient winner background
+QualityTier = namedtuple("QualityTier", [
+    "name", "explosion_particles", "shadow_passes", "confetti_cap", "road_detail",
+])
+
+# Best first
+QUALITY_TIERS = (
+    QualityTier("high", 15, 4, 200, True),
+    QualityTier("medium", 10, 2, 120, True),
+    QualityTier("low", 6, 1, 60, False),
+    QualityTier("minimal", 3, 0, 25, False),
+)
+
+def find_tier(name):
+    for index, tier in enumerate(QUALITY_TIERS):
+        if tier.name == name:
+            return index
+    raise ValueError(f"Unknown quality tier: {name}")
+
+# ===========================
+# Governor
+# ===========================
+class QualityGovernor:
+    # Watches the rolling mean of frame work time (everything but the wait
+    # for the frame cap). Over degrade_at of the budget it drops one tier;
+    # under restore_at for restore_windows full windows in a row it goes
+    # back up one. After every change the window starts over, so each tier
+    # is judged on its own frames.
+
+    def __init__(self, budget=1 / 60, window=60, degrade_at=0.9, restore_at=0.5,
+                 restore_windows=5, tier=0, lowest=len(QUALITY_TIERS) - 1):
+        self.budget = budget
+        self.times = deque(maxlen=window)
+        self.total = 0.0
+        self.degrade_at = degrade_at
+        self.restore_at = restore_at
+        self.restore_windows = restore_windows
+        self.headroom_windows = 0
+        self.index = tier
+        self.lowest = lowest
+        self.frames = 0
+        self.transitions = 0
+        self.frames_per_tier = [0] * len(QUALITY_TIERS)
+
+    @property
+    def tier(self):
+        return QUALITY_TIERS[self.index]
+
+    def update(self, frame_time):
+        # Returns the new tier when it changed, else None
+        times = self.times
+        if len(times) == times.maxlen:
+            self.total -= times[0]
+        times.append(frame_time)
+        self.total += frame_time
+        self.frames += 1
+        self.frames_per_tier[self.index] += 1
+        if len(times) < times.maxlen:
+            return None
+
+        mean = self.total / len(times)
+        if mean > self.budget * self.degrade_at and self.index < self.lowest:
+            return self.change(self.index + 1, mean)
+
+        if mean < self.budget * self.restore_at and self.index > 0:
+            self.headroom_windows += 1
+            if self.headroom_windows >= self.restore_windows:
+                return self.change(self.index - 1, mean)
+            times.clear()
+            self.total = 0.0
+        else:
+            self.headroom_windows = 0
+        return None
+
+    def change(self, index, mean):
+        old = self.tier
+        self.index = index
+        self.transitions += 1
+        self.headroom_windows = 0
+        self.times.clear()
+        self.total = 0.0
+        log.info("Quality %s -> %s (frame work %.1f ms, budget %.1f ms)",
+                 old.name, self.tier.name, mean * 1000, self.budget * 1000)
+        return self.tier
+
+    def log_summary(self):
+        if not self.frames:
+            return
+        shares = ", ".join(f"{tier.name} {frames / self.frames:.0%}"
+                           for tier, frames in zip(QUALITY_TIERS, self.frames_per_tier) if frames)
+        log.info("Quality changed %d times in %d frames (%s)", self.transitions, self.frames, shares)
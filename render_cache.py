@@ -0,0 +1,169 @@
+import time
+from collections import OrderedDict
+
+import pygame
+
+# ===========================
+# Text cache
+# ===========================
+class TextCache:
+    # Rendered text surfaces keyed by (font, text, color, antialias).
+    # Fixed strings live in a bounded LRU; dynamic strings such as the score
+    # go through render_slot() so each HUD line keeps only its latest value
+    # and never pushes the fixed strings out of the LRU.
+
+    def __init__(self, max_size=256):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.slots = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def render(self, font, text, color, antialias=True):
+        key = (font, text, color, antialias)
+        surface = self.entries.get(key)
+        if surface is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return surface
+
+        self.misses += 1
+        surface = font.render(text, antialias, color)
+        self.entries[key] = surface
+        if len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+        return surface
+
+    def render_slot(self, slot, font, text, color, antialias=True):
+        # Re-render only when the text (or its style) changed since last call
+        key = (font, text, color, antialias)
+        cached = self.slots.get(slot)
+        if cached is not None and cached[0] == key:
+            self.hits += 1
+            return cached[1]
+
+        self.misses += 1
+        surface = font.render(text, antialias, color)
+        self.slots[slot] = (key, surface)
+        return surface
+
+    def clear(self):
+        self.entries.clear()
+        self.slots.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "slots": len(self.slots),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+# ===========================
+# Static layers
+# ===========================
+class LayerCache:
+    # Pre-composited screen layers. get() returns the cached surface for
+    # name and only calls build() again when key differs from the key the
+    # layer was last built with (e.g. the score shown on it).
+
+    def __init__(self):
+        self.layers = {}
+        self.builds = 0
+
+    def get(self, name, key, build):
+        cached = self.layers.get(name)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+
+        surface = build()
+        self.builds += 1
+        self.layers[name] = (key, surface)
+        return surface
+
+    def clear(self):
+        self.layers.clear()
+
+# ===========================
+# Derived surfaces
+# ===========================
+class SurfaceCache:
+    # Surfaces derived from others (translucent sprite variants) and plain
+    # overlays, made once instead of per frame. Translucent variants are
+    # keyed by the source surface itself, so a replaced asset gets a fresh
+    # variant. allocations counts the surfaces this cache had to create.
+
+    def __init__(self):
+        self.surfaces = {}
+        self.allocations = 0
+
+    def translucent(self, surface, alpha):
+        key = ("translucent", surface, alpha)
+        cached = self.surfaces.get(key)
+        if cached is None:
+            cached = surface.copy()
+            cached.set_alpha(alpha)
+            self.surfaces[key] = cached
+            self.allocations += 1
+        return cached
+
+    def overlay(self, size, color, alpha):
+        # Solid color surface with surface-wide alpha, e.g. a dimming layer
+        key = ("overlay", size, color, alpha)
+        cached = self.surfaces.get(key)
+        if cached is None:
+            cached = pygame.Surface(size)
+            cached.fill(color)
+            cached.set_alpha(alpha)
+            self.surfaces[key] = cached
+            self.allocations += 1
+        return cached
+
+    def circle(self, color, radius, width=0):
+        # pygame.draw.circle as a sprite; blit it at (cx - radius, cy - radius)
+        key = ("circle", color, radius, width)
+        cached = self.surfaces.get(key)
+        if cached is None:
+            cached = pygame.Surface((2 * radius, 2 * radius))
+            background = (0, 0, 0) if color != (0, 0, 0) else (255, 255, 255)
+            cached.fill(background)
+            cached.set_colorkey(background)
+            pygame.draw.circle(cached, color, (radius, radius), radius, width)
+            self.surfaces[key] = cached
+            self.allocations += 1
+        return cached
+
+    def clear(self):
+        self.surfaces.clear()
+
+# ===========================
+# Animation atlases
+# ===========================
+def surface_bytes(surface):
+    return surface.get_pitch() * surface.get_height()
+
+class FrameAtlas:
+    # Every frame of a periodic animation (a pulsing font size, a color
+    # cycle) rendered up front. build(key) makes the surface, or tuple of
+    # surfaces, for one quantized animation value; drawing then only indexes.
+
+    def __init__(self, keys, build):
+        start = time.perf_counter()
+        self.frames = {key: build(key) for key in keys}
+        self.build_time = time.perf_counter() - start
+
+        self.bytes = 0
+        for frame in self.frames.values():
+            for surface in frame if isinstance(frame, tuple) else (frame,):
+                self.bytes += surface_bytes(surface)
+
+    def __getitem__(self, key):
+        return self.frames[key]
+
+    def __len__(self):
+        return len(self.frames)
@@ -0,0 +1,59 @@
+from itertools import chain, repeat
+from operator import itemgetter
+
+# Draw layers, back to front
+LAYER_ENEMIES = 0
+LAYER_POWERUPS = 1
+LAYER_PARTICLES = 2
+LAYER_SHIELD = 3  # Ring under the player car
+LAYER_PLAYER = 4
+LAYER_HUD = 5
+
+# ===========================
+# Render queue
+# ===========================
+class RenderQueue:
+    # Blits collected during a frame and submitted with one Surface.blits()
+    # call. Positions are bucketed by layer and texture, so equal sprites go
+    # out back to back; within one texture the submit order is kept.
+    # flush() returns the drawn rects for the dirty rect tracker.
+
+    def __init__(self):
+        self.batches = {}
+        self.count = 0
+        self.submitted = 0
+
+    def __len__(self):
+        return self.count
+
+    def batch(self, layer, surface):
+        key = (layer, id(surface))
+        batch = self.batches.get(key)
+        if batch is None:
+            batch = self.batches[key] = (surface, [])
+        return batch[1]
+
+    def add(self, layer, surface, position):
+        self.batch(layer, surface).append(position)
+        self.count += 1
+
+    def add_many(self, layer, surface, positions):
+        # The same sprite at many positions (enemies, particles of one color)
+        batch = self.batch(layer, surface)
+        before = len(batch)
+        batch.extend(positions)
+        self.count += len(batch) - before
+
+    def flush(self, target):
+        sequence = chain.from_iterable(
+            zip(repeat(surface), positions)
+            for _, (surface, positions) in sorted(self.batches.items(), key=itemgetter(0)))
+        rects = target.blits(sequence)
+        self.submitted += self.count
+        self.clear()
+        return rects
+
+    def clear(self):
+        # Drops the surfaces too, so no texture id outlives its surface
+        self.batches.clear()
+        self.count = 0
@@ -0,0 +1,178 @@
+import argparse
+import json
+import logging
+import sys
+import zlib
+
+from entity_engine import BACKENDS, create_state
+from game_state import Inputs, MENU, PLAYING, GAME_OVER, PAUSED, WINNER
+
+# ===========================
+# File format
+# ===========================
+# One JSON header line (seed, tick rate, backend, expected result) followed
+# by a zlib-compressed stream with one byte per simulation tick:
+#   bit 0   left held
+#   bit 1   right held
+#   bit 2   a new game was started before this tick
+#   bit 3-5 mode before the tick (covers pause, menu and restarts)
+REPLAY_VERSION = 1
+LEFT = 1
+RIGHT = 2
+START = 4
+MODE_SHIFT = 3
+
+MODE_NAMES = {MENU: "menu", PLAYING: "playing", GAME_OVER: "game_over",
+              PAUSED: "paused", WINNER: "winner"}
+
+def outcome(state):
+    # The values a replay has to reproduce
+    return {
+        "score": state.score,
+        "level": state.level,
+        "player_lives": state.player_lives,
+        "mode": MODE_NAMES[state.mode],
+    }
+
+# ===========================
+# Recording
+# ===========================
+class Recorder:
+    def __init__(self, seed, tick_rate, backend):
+        self.seed = seed
+        self.tick_rate = tick_rate
+        self.backend = backend
+        self.ticks = bytearray()
+        self.started = False
+
+    def mark_start(self):
+        self.started = True
+
+    def record(self, mode, inputs):
+        # Call right before every state.step()
+        flags = mode << MODE_SHIFT
+        if inputs.left:
+            flags |= LEFT
+        if inputs.right:
+            flags |= RIGHT
+        if self.started:
+            flags |= START
+            self.started = False
+        self.ticks.append(flags)
+
+    def save(self, path, state):
+        header = {
+            "version": REPLAY_VERSION,
+            "seed": self.seed,
+            "tick_rate": self.tick_rate,
+            "backend": self.backend,
+            "ticks": len(self.ticks),
+            "result": outcome(state),
+        }
+        with open(path, "wb") as f:
+            f.write(json.dumps(header).encode() + b"\n")
+            f.write(zlib.compress(bytes(self.ticks), 9))
+
+def load(path):
+    with open(path, "rb") as f:
+        header = json.loads(f.readline())
+        ticks = zlib.decompress(f.read())
+    if header.get("version") != REPLAY_VERSION:
+        raise ValueError(f"{path}: unsupported replay version {header.get('version')}")
+    if len(ticks) != header["ticks"]:
+        raise ValueError(f"{path}: expected {header['ticks']} ticks, found {len(ticks)}")
+    return header, ticks
+
+# ===========================
+# Playback
+# ===========================
+def apply_tick(state, flags):
+    # Repeat what the keyboard did before this tick, returns the inputs
+    if flags & START:
+        state.start()
+    mode = flags >> MODE_SHIFT
+    if state.mode != mode:
+        state.mode = mode
+    return Inputs(left=bool(flags & LEFT), right=bool(flags & RIGHT))
+
+def run_headless(header, ticks, backend=None):
+    # As fast as the CPU allows; backend may differ from the recorded one
+    state = create_state(backend or header["backend"], seed=header["seed"],
+                         tick_rate=header["tick_rate"])
+    for flags in ticks:
+        state.step(apply_tick(state, flags))
+    return state
+
+def run_visible(header, ticks, speed=1.0, capture_path=None, capture_format="raw"):
+    # Draws every tick with the game's renderer, speed scales the tick rate.
+    # With capture_path every drawn tick is also saved (see capture.py).
+    import pygame
+    import game_mobil_balap as game
+    from capture import FrameCapture
+
+    state = create_state(header["backend"], seed=header["seed"],
+                         tick_rate=header["tick_rate"])
+    game.state = state
+    clock = pygame.time.Clock()
+    fps = int(header["tick_rate"] * speed)
+    capture = None
+    if capture_path:
+        capture = FrameCapture(game.screen, capture_path, capture_format, fps=header["tick_rate"])
+
+    for flags in ticks:
+        if any(event.type == pygame.QUIT for event in pygame.event.get()):
+            break
+        if flags & START:
+            # Also clears the renderer's confetti; start() must run only once
+            game.start_game()
+            flags &= ~START
+        state.step(apply_tick(state, flags))
+        game.animate(state, state.dt)
+        game.draw_frame(state)
+        if capture is not None:
+            capture.capture()
+        pygame.display.update()
+        clock.tick(fps)
+
+    if capture is not None:
+        capture.close()
+    return state
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Replay recorded sessions and check their result")
+    parser.add_argument("replays", nargs="+", help="files written with game_mobil_balap.py --record")
+    parser.add_argument("--visible", action="store_true",
+                        help="draw the replay instead of running it headless")
+    parser.add_argument("--speed", type=float, default=1.0,
+                        help="playback speed for --visible (default: %(default)s)")
+    parser.add_argument("--capture", metavar="PATH",
+                        help="with --visible, save every frame (e.g. for attract-mode videos)")
+    parser.add_argument("--capture-format", choices=("raw", "png"), default="raw")
+    parser.add_argument("--backend", choices=sorted(BACKENDS),
+                        help="headless backend to check against (default: the recorded one)")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(name)s: %(message)s")
+    failures = 0
+
+    for path in args.replays:
+        header, ticks = load(path)
+        if args.visible:
+            state = run_visible(header, ticks, args.speed, args.capture, args.capture_format)
+        else:
+            state = run_headless(header, ticks, args.backend)
+
+        expected = header["result"]
+        actual = outcome(state)
+        if actual == expected:
+            print(f"OK        {path} ({len(ticks)} ticks, score {actual['score']})")
+        else:
+            failures += 1
+            print(f"MISMATCH  {path}: expected {expected}, got {actual}")
+
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
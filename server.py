@@ -0,0 +1,475 @@
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import random
+import struct
+from itertools import chain
+from time import perf_counter, process_time
+
+from entity_engine import BACKENDS, create_state
+from game_state import Inputs, NO_INPUT, TICK_RATE, MENU, PLAYING, PAUSED, GAME_OVER, WINNER
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 5800
+# A client whose unsent data grows past this gets no updates until it
+# drains, then one full update so it can resync
+MAX_SEND_BUFFER = 64 * 1024
+# Further behind than this and the scheduler skips ticks instead of catching up
+MAX_TICK_LAG = 0.25
+# Seconds between throughput/jitter log lines
+REPORT_INTERVAL = 5
+# Pending connections the listening socket queues, a cabinet hall may boot at once
+BACKLOG = 1024
+# --loopback waits this long for its clients, then one more second for the
+# scheduler to settle before it measures
+CONNECT_TIMEOUT = 10
+
+log = logging.getLogger(__name__)
+
+# ===========================
+# Protocol
+# ===========================
+# On connect the server sends HELLO. After that every message is a u16
+# length followed by the payload, all little-endian.
+#
+# Client -> server: one byte whenever the input changes
+#   bit 0 left held, bit 1 right held, bit 2 start a game,
+#   bit 3 pause/resume, bit 4 back to the menu
+#
+# Server -> client: one delta per tick in which something changed. A field
+# mask byte, then only the fields whose bit is set, in bit order:
+#   mode u8, score u32, level u8, lives i8, effects u8 (shield, slow,
+#   boost bits), player x i16, enemies section, power-ups section
+# An entity section is either MOVED, one i8 y step per entity when the
+# list is the same entities as before, or FULL, a u16 count and then
+# x i16, y i16 (power-ups also type u8) per entity.
+MAGIC = b"RACE"
+PROTOCOL_VERSION = 1
+HELLO = struct.Struct("<4sBHI")  # magic, version, tick rate, seed
+LENGTH = struct.Struct("<H")
+
+LEFT = 1
+RIGHT = 2
+START = 4
+PAUSE = 8
+ESCAPE = 16
+
+FIELD_MODE = 1
+FIELD_SCORE = 2
+FIELD_LEVEL = 4
+FIELD_LIVES = 8
+FIELD_EFFECTS = 16
+FIELD_PLAYER = 32
+FIELD_ENEMIES = 64
+FIELD_POWERUPS = 128
+
+SCALAR_FIELDS = (
+    (FIELD_MODE, struct.Struct("<B")),
+    (FIELD_SCORE, struct.Struct("<I")),
+    (FIELD_LEVEL, struct.Struct("<B")),
+    (FIELD_LIVES, struct.Struct("<b")),
+    (FIELD_EFFECTS, struct.Struct("<B")),
+    (FIELD_PLAYER, struct.Struct("<h")),
+)
+
+SECTION_MOVED = 0
+SECTION_FULL = 1
+ENEMY_FORMAT = "hh"
+POWERUP_FORMAT = "hhB"
+
+def scalars(state):
+    return (state.mode, state.score, state.level, state.player_lives,
+            state.shield_active | state.slow_active << 1 | state.boost_active << 2,
+            int(state.player_x))
+
+def entity_section(previous, current, item_format):
+    # Encoded section, or None when nothing moved
+    if current == previous:
+        return None
+    if previous is not None and len(previous) == len(current):
+        steps = []
+        for old, new in zip(previous, current):
+            step = new[1] - old[1]
+            if old[0] != new[0] or old[2:] != new[2:] or not -128 <= step <= 127:
+                break
+            steps.append(step)
+        else:
+            return struct.pack(f"<B{len(steps)}b", SECTION_MOVED, *steps)
+    return struct.pack(f"<BH{item_format * len(current)}", SECTION_FULL, len(current),
+                       *chain.from_iterable(current))
+
+# ===========================
+# Delta encoding
+# ===========================
+class DeltaEncoder:
+    # Remembers what the client was last sent and encodes only the changes,
+    # on the integer positions a renderer draws
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        # The next update is a full one
+        self.scalars = None
+        self.enemies = None
+        self.powerups = None
+
+    def encode(self, state):
+        # Payload for this tick, or None when the client is up to date
+        mask = 0
+        parts = [b""]
+        values = scalars(state)
+        previous = self.scalars
+        for i, (bit, field) in enumerate(SCALAR_FIELDS):
+            if previous is None or values[i] != previous[i]:
+                mask |= bit
+                parts.append(field.pack(values[i]))
+        self.scalars = values
+
+        enemies = [(int(x), int(y)) for x, y in state.enemy_positions()]
+        section = entity_section(self.enemies, enemies, ENEMY_FORMAT)
+        if section is not None:
+            mask |= FIELD_ENEMIES
+            parts.append(section)
+            self.enemies = enemies
+
+        powerups = [(int(x), int(y), powerup_type) for x, y, powerup_type in state.powerup_items()]
+        section = entity_section(self.powerups, powerups, POWERUP_FORMAT)
+        if section is not None:
+            mask |= FIELD_POWERUPS
+            parts.append(section)
+            self.powerups = powerups
+
+        if not mask:
+            return None
+        parts[0] = bytes((mask,))
+        return b"".join(parts)
+
+class SessionView:
+    # Client side mirror of one session, rebuilt from the deltas
+
+    def __init__(self):
+        self.mode = MENU
+        self.score = 0
+        self.level = 1
+        self.lives = 0
+        self.effects = 0
+        self.player_x = 0
+        self.enemies = []
+        self.powerups = []
+
+    def apply(self, payload):
+        mask = payload[0]
+        offset = 1
+        values = [self.mode, self.score, self.level, self.lives, self.effects, self.player_x]
+        for i, (bit, field) in enumerate(SCALAR_FIELDS):
+            if mask & bit:
+                values[i] = field.unpack_from(payload, offset)[0]
+                offset += field.size
+        self.mode, self.score, self.level, self.lives, self.effects, self.player_x = values
+
+        if mask & FIELD_ENEMIES:
+            self.enemies, offset = self.apply_section(self.enemies, payload, offset, ENEMY_FORMAT)
+        if mask & FIELD_POWERUPS:
+            self.powerups, offset = self.apply_section(self.powerups, payload, offset, POWERUP_FORMAT)
+
+    def apply_section(self, items, payload, offset, item_format):
+        kind = payload[offset]
+        offset += 1
+        if kind == SECTION_MOVED:
+            steps = struct.unpack_from(f"<{len(items)}b", payload, offset)
+            moved = [(item[0], item[1] + step) + item[2:] for item, step in zip(items, steps)]
+            return moved, offset + len(items)
+
+        count = LENGTH.unpack_from(payload, offset)[0]
+        offset += LENGTH.size
+        fmt = struct.Struct("<" + item_format)
+        items = [fmt.unpack_from(payload, offset + i * fmt.size) for i in range(count)]
+        return items, offset + count * fmt.size
+
+# ===========================
+# Server
+# ===========================
+class Session:
+    # One cabinet: its own GameState fed by one client connection
+
+    def __init__(self, number, state, writer):
+        self.number = number
+        self.state = state
+        self.writer = writer
+        self.inputs = NO_INPUT
+        self.encoder = DeltaEncoder()
+        self.stalled = 0
+
+    def handle(self, flags):
+        # Same rules as the keyboard in game_mobil_balap.handle_key
+        state = self.state
+        self.inputs = Inputs(left=bool(flags & LEFT), right=bool(flags & RIGHT))
+        if flags & START and state.mode in (MENU, GAME_OVER, WINNER):
+            state.start()
+        if flags & PAUSE:
+            if state.mode == PLAYING:
+                state.mode = PAUSED
+            elif state.mode == PAUSED:
+                state.mode = PLAYING
+        if flags & ESCAPE and state.mode in (PAUSED, GAME_OVER, WINNER):
+            state.mode = MENU
+
+class TickStats:
+    # Tick lateness (scheduler jitter) and simulation work per report period
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.lateness = []
+        self.work = []
+        self.cpu = 0.0
+        self.sessions = 0
+        self.bytes_sent = 0
+        self.updates = 0
+        self.skipped_ticks = 0
+        self.started = perf_counter()
+
+    def report(self, tick_rate):
+        elapsed = perf_counter() - self.started
+        if not self.work:
+            return None
+        lateness = sorted(self.lateness)
+        work = sorted(self.work)
+        mean_work = sum(work) / len(work)
+        mean_cpu = self.cpu / len(work)
+        return {
+            "sessions": self.sessions,
+            "ticks_per_second": len(work) / elapsed,
+            "skipped_ticks": self.skipped_ticks,
+            "work_ms_mean": mean_work * 1000,
+            "work_ms_p99": work[int(0.99 * (len(work) - 1))] * 1000,
+            "cpu_ms_mean": mean_cpu * 1000,
+            # How many sessions one core could keep at this tick rate, from
+            # CPU time so clients sharing the machine do not count
+            "sessions_per_core": self.sessions / (mean_cpu * tick_rate) if mean_cpu else 0.0,
+            "lateness_ms_p50": lateness[len(lateness) // 2] * 1000,
+            "lateness_ms_p99": lateness[int(0.99 * (len(lateness) - 1))] * 1000,
+            "lateness_ms_max": lateness[-1] * 1000,
+            "bytes_per_update": self.bytes_sent / self.updates if self.updates else 0.0,
+            "kib_per_second": self.bytes_sent / elapsed / 1024,
+        }
+
+class GameServer:
+    # Every session steps in one asyncio task at a fixed tick rate; each
+    # connection only has a small task reading its input bytes
+
+    def __init__(self, backend="objects", tick_rate=TICK_RATE, seed=0, max_send_buffer=MAX_SEND_BUFFER):
+        self.backend = backend
+        self.tick_rate = tick_rate
+        self.seed = seed
+        self.max_send_buffer = max_send_buffer
+        self.sessions = {}
+        self.opened = 0
+        self.stats = TickStats()
+
+    async def handle_client(self, reader, writer):
+        number = self.opened
+        self.opened += 1
+        seed = self.seed + number
+        session = Session(number, create_state(self.backend, seed=seed, tick_rate=self.tick_rate), writer)
+        writer.write(HELLO.pack(MAGIC, PROTOCOL_VERSION, self.tick_rate, seed))
+        self.sessions[number] = session
+        try:
+            while True:
+                data = await reader.read(256)
+                if not data:
+                    break
+                for flags in data:
+                    session.handle(flags)
+        except ConnectionError:
+            pass
+        finally:
+            del self.sessions[number]
+            writer.close()
+
+    def tick(self):
+        stats = self.stats
+        for session in self.sessions.values():
+            state = session.state
+            state.step(session.inputs)
+            if session.writer.transport.get_write_buffer_size() > self.max_send_buffer:
+                session.encoder.reset()
+                session.stalled += 1
+                continue
+            payload = session.encoder.encode(state)
+            if payload is not None:
+                session.writer.write(LENGTH.pack(len(payload)) + payload)
+                stats.bytes_sent += LENGTH.size + len(payload)
+                stats.updates += 1
+
+    async def run_ticks(self):
+        loop = asyncio.get_running_loop()
+        dt = 1.0 / self.tick_rate
+        deadline = loop.time()
+        last_report = deadline
+        while True:
+            deadline += dt
+            delay = deadline - loop.time()
+            # Always yield once so connections get served between ticks
+            await asyncio.sleep(max(delay, 0))
+            now = loop.time()
+            lateness = now - deadline
+            if lateness > MAX_TICK_LAG:
+                self.stats.skipped_ticks += int(lateness / dt)
+                deadline = now
+
+            start = perf_counter()
+            start_cpu = process_time()
+            self.tick()
+            stats = self.stats
+            stats.cpu += process_time() - start_cpu
+            stats.work.append(perf_counter() - start)
+            stats.lateness.append(lateness)
+            stats.sessions = max(stats.sessions, len(self.sessions))
+
+            if now - last_report >= REPORT_INTERVAL:
+                last_report = now
+                self.log_report()
+
+    def log_report(self):
+        report = self.stats.report(self.tick_rate)
+        if report is not None:
+            log.info("%d sessions, %.1f ticks/s, work %.2f ms (p99 %.2f), %.0f sessions/core, "
+                     "lateness p50 %.2f ms p99 %.2f ms max %.2f ms, %.1f KiB/s",
+                     report["sessions"], report["ticks_per_second"], report["work_ms_mean"],
+                     report["work_ms_p99"], report["sessions_per_core"], report["lateness_ms_p50"],
+                     report["lateness_ms_p99"], report["lateness_ms_max"], report["kib_per_second"])
+        self.stats.reset()
+
+    def close_sessions(self):
+        for session in self.sessions.values():
+            session.writer.close()
+
+    async def start(self, host=DEFAULT_HOST, port=DEFAULT_PORT, unix_path=None):
+        if unix_path:
+            server = await asyncio.start_unix_server(self.handle_client, unix_path, backlog=BACKLOG)
+        else:
+            server = await asyncio.start_server(self.handle_client, host, port, backlog=BACKLOG)
+        log.info("Serving on %s", ", ".join(str(s.getsockname()) for s in server.sockets))
+        return server
+
+# ===========================
+# Loopback client
+# ===========================
+async def open_connection(host, port, unix_path):
+    if unix_path:
+        return await asyncio.open_unix_connection(unix_path)
+    return await asyncio.open_connection(host, port)
+
+async def run_client(host, port, unix_path, seed, on_update=None):
+    # Plays randomly like tuner.py's random player and restarts after every
+    # game; on_update(view) is called after each applied delta
+    reader, writer = await open_connection(host, port, unix_path)
+    magic, version, tick_rate, session_seed = HELLO.unpack(await reader.readexactly(HELLO.size))
+    if magic != MAGIC or version != PROTOCOL_VERSION:
+        raise ConnectionError("Not a race server or wrong protocol version")
+
+    rng = random.Random(seed)
+    view = SessionView()
+    writer.write(bytes((START,)))
+    restarting = True
+    try:
+        while True:
+            length = LENGTH.unpack(await reader.readexactly(LENGTH.size))[0]
+            view.apply(await reader.readexactly(length))
+            if on_update is not None:
+                on_update(view)
+
+            if view.mode == PLAYING:
+                restarting = False
+                if rng.random() < 1 / 30:
+                    writer.write(bytes((rng.choice((0, LEFT, RIGHT)),)))
+            elif view.mode in (GAME_OVER, WINNER) and not restarting:
+                writer.write(bytes((START,)))
+                restarting = True
+    finally:
+        writer.close()
+
+async def run_clients(host, port, unix_path, clients, seed=0):
+    # Until the server closes the connections
+    await asyncio.gather(*(run_client(host, port, unix_path, seed + i) for i in range(clients)),
+                         return_exceptions=True)
+
+def loopback_process(host, port, unix_path, clients, seed):
+    # Clients run in their own process so decoding does not count as server work
+    asyncio.run(run_clients(host, port, unix_path, clients, seed))
+
+# ===========================
+# Command line
+# ===========================
+def print_report(report):
+    print(f"sessions           {report['sessions']}")
+    print(f"ticks per second   {report['ticks_per_second']:.1f} ({report['skipped_ticks']} skipped)")
+    print(f"tick work          mean {report['work_ms_mean']:.2f} ms, p99 {report['work_ms_p99']:.2f} ms, "
+          f"cpu {report['cpu_ms_mean']:.2f} ms")
+    print(f"sessions per core  {report['sessions_per_core']:.0f}")
+    print(f"tick lateness      p50 {report['lateness_ms_p50']:.2f} ms, p99 {report['lateness_ms_p99']:.2f} ms, "
+          f"max {report['lateness_ms_max']:.2f} ms")
+    print(f"sent               {report['bytes_per_update']:.1f} bytes per update, "
+          f"{report['kib_per_second']:.1f} KiB/s")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run many game sessions for thin clients")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--unix", metavar="PATH", help="listen on a Unix socket instead of TCP")
+    parser.add_argument("--backend", choices=sorted(BACKENDS), default="objects")
+    parser.add_argument("--tick-rate", type=int, default=TICK_RATE)
+    parser.add_argument("--seed", type=int, default=0, help="session n plays seed + n")
+    parser.add_argument("--loopback", type=int, metavar="CLIENTS",
+                        help="connect this many local test clients, report and exit")
+    parser.add_argument("--seconds", type=float, default=10,
+                        help="length of the --loopback run (default: %(default)s)")
+    return parser.parse_args(argv)
+
+async def serve(args):
+    game_server = GameServer(args.backend, args.tick_rate, args.seed)
+    server = await game_server.start(args.host, args.port, args.unix)
+    ticks = asyncio.create_task(game_server.run_ticks())
+
+    if args.loopback is None:
+        async with server:
+            await server.serve_forever()
+        return
+
+    context = multiprocessing.get_context("spawn")
+    clients = context.Process(target=loopback_process, args=(
+        args.host, args.port, args.unix, args.loopback, args.seed))
+    clients.start()
+    # Measure once every client is connected and playing
+    loop = asyncio.get_running_loop()
+    give_up = loop.time() + CONNECT_TIMEOUT
+    while len(game_server.sessions) < args.loopback and loop.time() < give_up:
+        await asyncio.sleep(0.1)
+    if len(game_server.sessions) < args.loopback:
+        log.warning("Only %d of %d clients connected", len(game_server.sessions), args.loopback)
+    await asyncio.sleep(1)
+    game_server.stats.reset()
+    await asyncio.sleep(args.seconds)
+    report = game_server.stats.report(args.tick_rate)
+
+    ticks.cancel()
+    server.close()
+    game_server.close_sessions()
+    await loop.run_in_executor(None, clients.join)
+    if report is not None:
+        print_report(report)
+
+def main(argv=None):
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(name)s: %(message)s")
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+from collections import defaultdict
+
+# ===========================
+# Spatial hash
+# ===========================
+class SpatialHash:
+    # Uniform grid over the road. Every entity is stored in the cells its
+    # rect touches; move() only rewrites buckets when the entity crosses a
+    # cell border, so most ticks cost one tuple compare per entity. Queries
+    # look at the few cells under a rect instead of every entity.
+
+    def __init__(self, cell_size=100):
+        self.cell_size = cell_size
+        self.cells = defaultdict(set)
+        self.entries = {}
+
+    def __len__(self):
+        return len(self.entries)
+
+    def cells_for(self, x, y, w, h):
+        # Same truncation as pygame.Rect, which drops the fraction
+        x, y = int(x), int(y)
+        size = self.cell_size
+        cols = range(x // size, (x + w - 1) // size + 1)
+        rows = range(y // size, (y + h - 1) // size + 1)
+        return tuple((col, row) for col in cols for row in rows)
+
+    def insert(self, item, x, y, w, h):
+        keys = self.cells_for(x, y, w, h)
+        self.entries[item] = keys
+        for key in keys:
+            self.cells[key].add(item)
+
+    def move(self, item, x, y, w, h):
+        keys = self.cells_for(x, y, w, h)
+        old = self.entries[item]
+        if keys == old:
+            return
+        for key in old:
+            bucket = self.cells[key]
+            bucket.discard(item)
+            if not bucket:
+                del self.cells[key]
+        for key in keys:
+            self.cells[key].add(item)
+        self.entries[item] = keys
+
+    def remove(self, item):
+        for key in self.entries.pop(item):
+            bucket = self.cells[key]
+            bucket.discard(item)
+            if not bucket:
+                del self.cells[key]
+
+    def query(self, x, y, w, h):
+        # Candidates whose cells overlap the rect; callers do the exact test
+        found = set()
+        for key in self.cells_for(x, y, w, h):
+            bucket = self.cells.get(key)
+            if bucket:
+                found.update(bucket)
+        return found
+
+    def clear(self):
+        self.cells.clear()
+        self.entries.clear()
@@ -0,0 +1,24 @@
+import random
+
+import pytest
+
+from entity_engine import create_state
+from game_state import Inputs, PLAYING
+
+pytest.importorskip("numpy")
+
+def observe(state):
+    return (state.mode, state.score, state.level, state.player_lives, state.player_x,
+            state.enemy_positions(), state.powerup_items(), len(state.particles))
+
+@pytest.mark.parametrize("seed", range(5))
+def test_numpy_backend_plays_the_same_game(seed):
+    states = [create_state(backend, seed=seed) for backend in ("objects", "numpy")]
+    rng = random.Random(seed)
+    for tick in range(3000):
+        inputs = Inputs(left=rng.random() < 0.4, right=rng.random() < 0.4)
+        for state in states:
+            if state.mode != PLAYING:
+                state.start()
+            state.step(inputs)
+        assert observe(states[0]) == observe(states[1]), f"seed {seed}, tick {tick}"
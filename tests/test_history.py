@@ -0,0 +1,96 @@
+import sqlite3
+
+import pytest
+
+from entity_engine import BACKENDS, create_state
+from game_state import GAME_OVER, ENEMY_HEIGHT, HEIGHT, ROAD_LEFT
+from history import RunHistory
+
+def run_rows(path):
+    with sqlite3.connect(path) as connection:
+        return connection.execute("SELECT score, won FROM runs").fetchall()
+
+def result(score, won=False, **extra):
+    return dict(score=score, level=1, lives_lost=3, powerups=0, duration=10.0, won=won, **extra)
+
+def last_life(backend, path):
+    history = RunHistory(path)
+    state = create_state(backend, seed=1)
+    state.history = history
+    state.start()
+    state.player_lives = 1
+    return state, history
+
+def add_crash(state, offset=0):
+    # An enemy overlapping the player, so it hits in the next tick
+    state.insert_enemy(state.player_x + offset, state.player_y - ENEMY_HEIGHT // 2, 0)
+
+@pytest.mark.parametrize("backend", sorted(BACKENDS))
+def test_two_hits_on_last_life_record_one_run(tmp_path, backend):
+    path = str(tmp_path / "history.db")
+    state, history = last_life(backend, path)
+    add_crash(state)
+    add_crash(state, 5)
+    state.step()
+    history.close()
+
+    assert state.mode == GAME_OVER
+    assert len(run_rows(path)) == 1
+    with sqlite3.connect(path) as connection:
+        assert connection.execute("SELECT games FROM days").fetchone()[0] == 1
+
+@pytest.mark.parametrize("backend", sorted(BACKENDS))
+def test_crash_in_the_winning_tick_is_game_over(tmp_path, backend):
+    path = str(tmp_path / "history.db")
+    state, history = last_life(backend, path)
+    state.level = state.max_level
+    state.score = state.max_level * state.level_up_score - 10
+    # Leaves the screen this tick and wins the game, then the crash lands
+    state.insert_enemy(ROAD_LEFT, HEIGHT, 300)
+    add_crash(state)
+    state.step()
+    history.close()
+
+    assert state.mode == GAME_OVER
+    assert state.player_lives == 0
+    assert run_rows(path) == [(state.score, 0)]
+
+def test_close_writes_every_queued_run(tmp_path):
+    path = str(tmp_path / "history.db")
+    history = RunHistory(path)
+    for score in range(250):
+        history.record(result(score))
+    history.close()
+
+    assert len(run_rows(path)) == 250
+    reopened = RunHistory(path)
+    assert reopened.best_score() == 249
+    reopened.close()
+
+def test_queries_only_see_their_own_source(tmp_path):
+    path = str(tmp_path / "history.db")
+    history = RunHistory(path)
+    history.record(result(50))
+    history.record(result(70, won=True))
+    history.record(result(900, source="tuner"))
+    history.record(result(800, source="tuner"))
+    history.record(result(700, source="tuner"))
+    history.close()
+
+    game = RunHistory(path)
+    day = game.top(1)[0]["day"]
+    assert game.best_score() == 70
+    assert [run["score"] for run in game.top()] == [70, 50]
+    assert [run["score"] for run in game.top(day=day)] == [70, 50]
+    assert game.day_summary(day) == {"day": day, "games": 2, "best": 70, "average": 60.0, "wins": 1}
+    assert game.recent_days() == [game.day_summary(day)]
+
+    assert game.best_score("tuner") == 900
+    assert [run["score"] for run in game.top(source="tuner")] == [900, 800, 700]
+    assert game.day_summary(day, "tuner")["games"] == 3
+    game.close()
+
+    tuner = RunHistory(path, source="tuner")
+    assert tuner.best_score() == 900
+    assert tuner.recent_days()[0]["games"] == 3
+    tuner.close()
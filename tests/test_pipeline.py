@@ -0,0 +1,46 @@
+import time
+
+import pytest
+
+from entity_engine import BACKENDS, create_state
+from game_state import Inputs, PLAYING
+from pipeline import SimulationThread, StateSnapshot
+from replay import Recorder, apply_tick
+
+class KeepingSimulation(SimulationThread):
+    # Also keeps every published snapshot, in tick order
+    def __init__(self, state, recorder):
+        super().__init__(state, recorder)
+        self.published = []
+
+    def tick(self, inputs, now):
+        super().tick(inputs, now)
+        self.published.append(self.snapshot)
+
+def start_game(sim):
+    # Like game_mobil_balap.start_game(), on the simulation thread
+    sim.recorder.mark_start()
+    sim.state.start()
+    sim.games += 1
+
+@pytest.mark.parametrize("backend", sorted(BACKENDS))
+def test_threaded_snapshots_match_direct_steps(backend):
+    state = create_state(backend, seed=4, tick_rate=600)
+    sim = KeepingSimulation(state, Recorder(4, 600, backend))
+    sim.start()
+    for frame in range(60):
+        # The main thread changes keys and restarts finished games while
+        # the simulation runs on its own timing
+        view = sim.snapshot
+        if view.mode != PLAYING:
+            sim.send(lambda: start_game(sim))
+        sim.inputs = Inputs(left=frame % 6 < 3, right=frame % 4 == 0)
+        time.sleep(0.01)
+    sim.stop()
+
+    assert sim.ticks > 100
+    assert [snapshot.tick for snapshot in sim.published] == list(range(1, sim.ticks + 1))
+    direct = create_state(backend, seed=4, tick_rate=600)
+    for snapshot, flags in zip(sim.published, sim.recorder.ticks):
+        direct.step(apply_tick(direct, flags))
+        assert snapshot.values() == StateSnapshot(direct).values(), f"tick {snapshot.tick}"
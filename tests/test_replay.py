@@ -0,0 +1,49 @@
+import random
+
+import pytest
+
+from entity_engine import BACKENDS, create_state
+from game_state import Inputs, PLAYING, PAUSED
+from replay import Recorder, load, outcome, run_headless
+
+def record_session(path, backend, seed, ticks):
+    # Plays like the game loop does: random keys, a pause now and then and
+    # a restart after every finished game
+    state = create_state(backend, seed=seed)
+    recorder = Recorder(seed, state.tick_rate, backend)
+    rng = random.Random(seed)
+    for tick in range(ticks):
+        if state.mode not in (PLAYING, PAUSED):
+            recorder.mark_start()
+            state.start()
+        elif tick % 500 == 250:
+            state.mode = PAUSED
+        elif tick % 500 == 300:
+            state.mode = PLAYING
+        inputs = Inputs(left=rng.random() < 0.4, right=rng.random() < 0.4)
+        recorder.record(state.mode, inputs)
+        state.step(inputs)
+    recorder.save(path, state)
+    return state
+
+@pytest.mark.parametrize("recorded", sorted(BACKENDS))
+@pytest.mark.parametrize("replayed", sorted(BACKENDS))
+def test_replay_reproduces_the_recorded_game(tmp_path, recorded, replayed):
+    path = str(tmp_path / "session.rpl")
+    state = record_session(path, recorded, seed=3, ticks=4000)
+
+    header, ticks = load(path)
+    assert len(ticks) == 4000
+    assert header["result"] == outcome(state)
+    replay = run_headless(header, ticks, replayed)
+    assert outcome(replay) == header["result"]
+    assert (replay.frame, replay.player_x, replay.high_score) == (
+        state.frame, state.player_x, state.high_score)
+
+def test_replay_detects_changed_input(tmp_path):
+    path = str(tmp_path / "session.rpl")
+    record_session(path, "objects", seed=3, ticks=4000)
+    header, ticks = load(path)
+    # Steer hard left for the whole recording instead
+    changed = bytes((flags & ~3) | 1 for flags in ticks)
+    assert outcome(run_headless(header, changed)) != header["result"]
@@ -0,0 +1,241 @@
+import argparse
+import itertools
+import json
+import os
+import random
+import statistics
+from multiprocessing import Pool
+
+from entity_engine import BACKENDS, create_state
+from history import RunHistory
+from game_state import (
+    GameState, Inputs, NO_INPUT,
+    PLAYER_WIDTH, PLAYER_HEIGHT, ENEMY_HEIGHT, ROAD_LEFT, ROAD_RIGHT,
+    PLAYING, WINNER,
+)
+
+# Longest game the tuner plays, in simulated seconds
+MAX_GAME_SECONDS = 600
+
+# ===========================
+# Players
+# ===========================
+# A player is called once per tick with the state and returns Inputs.
+# make_player() gives every game its own seeded player.
+
+def idle_player(rng):
+    def play(state):
+        return NO_INPUT
+    return play
+
+def random_player(rng):
+    # Holds left, right or nothing and changes its mind about twice a second
+    choice = [NO_INPUT]
+    options = (NO_INPUT, Inputs(left=True), Inputs(right=True))
+
+    def play(state):
+        if rng.random() < 1 / 30:
+            choice[0] = rng.choice(options)
+        return choice[0]
+    return play
+
+def dodger_player(rng):
+    # Steers away from cars that are about to reach its lane
+    look_ahead = 250 + rng.randint(0, 100)
+
+    def play(state):
+        px, py = state.player_x, state.player_y
+        threats = [x for x, y in state.enemy_positions()
+                   if py - look_ahead < y + ENEMY_HEIGHT and y < py + PLAYER_HEIGHT
+                   and abs(x - px) < PLAYER_WIDTH + 10]
+        if not threats:
+            return NO_INPUT
+
+        # Move away from the threats, unless the road edge is in the way
+        go_left = sum(threats) / len(threats) >= px
+        if go_left and px - ROAD_LEFT < PLAYER_WIDTH:
+            go_left = False
+        elif not go_left and ROAD_RIGHT - PLAYER_WIDTH - px < PLAYER_WIDTH:
+            go_left = True
+        return Inputs(left=go_left, right=not go_left)
+    return play
+
+PLAYERS = {"idle": idle_player, "random": random_player, "dodger": dodger_player}
+
+def make_player(name, seed):
+    return PLAYERS[name](random.Random(seed))
+
+# ===========================
+# Games
+# ===========================
+def play_game(task):
+    # One headless game, runs in a worker process
+    config, player_name, seed, backend = task
+    state = create_state(backend, seed=seed, difficulty=config)
+    player = make_player(player_name, seed)
+    state.start()
+
+    max_ticks = MAX_GAME_SECONDS * state.tick_rate
+    while state.mode == PLAYING and state.frame < max_ticks:
+        state.step(player(state))
+
+    return {
+        "config": config,
+        "player": player_name,
+        "seed": seed,
+        "survival": state.frame * state.dt,
+        "score": state.score,
+        "level": state.level,
+        "lives_lost": state.lives_lost,
+        "powerups": state.powerups_collected,
+        "won": state.mode == WINNER,
+        "timed_out": state.mode == PLAYING,
+    }
+
+def task_key(config, player_name, seed):
+    return (json.dumps(config, sort_keys=True), player_name, seed)
+
+# ===========================
+# Sweep
+# ===========================
+def parse_values(text, cast):
+    return [cast(value) for value in text.split(",")]
+
+def parse_speed_ranges(text):
+    # "3-5,4-6" -> [(3, 5), (4, 6)]
+    ranges = []
+    for value in text.split(","):
+        low, high = value.split("-")
+        ranges.append((int(low), int(high)))
+    return ranges
+
+def build_configs(args):
+    configs = []
+    for spawn, per_level, speeds, cap, level_up in itertools.product(
+            args.spawn_chance, args.spawn_chance_per_level, args.enemy_speed,
+            args.enemy_cap, args.level_up_score):
+        configs.append({
+            "spawn_chance": spawn,
+            "spawn_chance_per_level": per_level,
+            "enemy_speed_min": speeds[0],
+            "enemy_speed_max": speeds[1],
+            "enemy_cap": cap,
+            "level_up_score": level_up,
+        })
+    return configs
+
+def load_results(path):
+    # Finished games from an earlier (possibly interrupted) run
+    results = []
+    if not os.path.exists(path):
+        return results
+    with open(path) as f:
+        for line in f:
+            try:
+                results.append(json.loads(line))
+            except json.JSONDecodeError:
+                pass  # Half-written last line of an interrupted run
+    return results
+
+def summarize(results):
+    groups = {}
+    for result in results:
+        key = (json.dumps(result["config"], sort_keys=True), result["player"])
+        groups.setdefault(key, []).append(result)
+
+    summary = []
+    for (config, player), games in groups.items():
+        scores = sorted(game["score"] for game in games)
+        survival = [game["survival"] for game in games]
+        summary.append({
+            "config": json.loads(config),
+            "player": player,
+            "games": len(games),
+            "win_rate": sum(game["won"] for game in games) / len(games),
+            "survival_mean": statistics.fmean(survival),
+            "survival_median": statistics.median(survival),
+            "score_mean": statistics.fmean(scores),
+            "score_p10": scores[int(0.1 * (len(scores) - 1))],
+            "score_p50": scores[int(0.5 * (len(scores) - 1))],
+            "score_p90": scores[int(0.9 * (len(scores) - 1))],
+        })
+    return summary
+
+def print_summary(summary):
+    print(f"{'spawn':>6} {'+lvl':>6} {'speed':>5} {'cap':>3} {'lvlup':>5} {'player':>7} "
+          f"{'games':>5} {'win%':>5} {'surv s':>7} {'p10':>4} {'p50':>4} {'p90':>4}")
+    for row in sorted(summary, key=lambda row: (row["player"], -row["win_rate"])):
+        c = row["config"]
+        print(f"{c['spawn_chance']:>6} {c['spawn_chance_per_level']:>6} "
+              f"{c['enemy_speed_min']}-{c['enemy_speed_max']:<3} {c['enemy_cap']:>3} "
+              f"{c['level_up_score']:>5} {row['player']:>7} {row['games']:>5} "
+              f"{row['win_rate'] * 100:>5.1f} {row['survival_mean']:>7.1f} "
+              f"{row['score_p10']:>4} {row['score_p50']:>4} {row['score_p90']:>4}")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Monte Carlo difficulty sweep with headless games")
+    parser.add_argument("--spawn-chance", type=lambda t: parse_values(t, float),
+                        default=[GameState.spawn_chance], help="comma separated values")
+    parser.add_argument("--spawn-chance-per-level", type=lambda t: parse_values(t, float),
+                        default=[GameState.spawn_chance_per_level])
+    parser.add_argument("--enemy-speed", type=parse_speed_ranges,
+                        default=[(GameState.enemy_speed_min, GameState.enemy_speed_max)],
+                        help="min-max ranges, e.g. 3-5,4-6")
+    parser.add_argument("--enemy-cap", type=lambda t: parse_values(t, int),
+                        default=[GameState.enemy_cap])
+    parser.add_argument("--level-up-score", type=lambda t: parse_values(t, int),
+                        default=[GameState.level_up_score])
+    parser.add_argument("--players", type=lambda t: t.split(","), default=["dodger"],
+                        help=f"comma separated, from: {', '.join(PLAYERS)}")
+    parser.add_argument("--games", type=int, default=100, help="games per config and player")
+    parser.add_argument("--backend", choices=sorted(BACKENDS), default="objects")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--results", default="tuner_results.jsonl",
+                        help="results file; games already in it are skipped (default: %(default)s)")
+    parser.add_argument("--summary", help="also write the per-config summary as JSON")
+    parser.add_argument("--history", metavar="FILE",
+                        help="also log every game to this run history database")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    for name in args.players:
+        if name not in PLAYERS:
+            raise SystemExit(f"Unknown player: {name}")
+
+    done = {task_key(r["config"], r["player"], r["seed"]) for r in load_results(args.results)}
+    tasks = [(config, player, seed, args.backend)
+             for config in build_configs(args)
+             for player in args.players
+             for seed in range(args.games)
+             if task_key(config, player, seed) not in done]
+    print(f"{len(done)} games already done, {len(tasks)} to play")
+
+    history = RunHistory(args.history, source="tuner") if args.history else None
+    if tasks:
+        with open(args.results, "a+") as f, Pool(args.workers) as pool:
+            # Start on a fresh line if the last run died mid-write
+            if f.tell():
+                f.seek(f.tell() - 1)
+                if f.read(1) != "\n":
+                    f.write("\n")
+            for finished, result in enumerate(pool.imap_unordered(play_game, tasks, chunksize=4), 1):
+                # One line per game, flushed so an interrupted sweep can resume
+                f.write(json.dumps(result) + "\n")
+                f.flush()
+                if history is not None:
+                    history.record(dict(result, duration=result["survival"]))
+                if finished % 100 == 0:
+                    print(f"{finished}/{len(tasks)} games")
+
+    if history is not None:
+        history.close()
+
+    summary = summarize(load_results(args.results))
+    print_summary(summary)
+    if args.summary:
+        with open(args.summary, "w") as f:
+            json.dump(summary, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,350 @@
+import argparse
+import time
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from game_state import (
+    GameState, DIFFICULTY_FIELDS, WIDTH, HEIGHT,
+    PLAYER_WIDTH, PLAYER_HEIGHT, ENEMY_WIDTH, ENEMY_HEIGHT, ROAD_LEFT, ROAD_RIGHT,
+    TICK_RATE, REFERENCE_FPS, SPAWN_ATTEMPTS, POWERUP_SIZE,
+    SHIELD_DURATION, SLOW_DURATION, BOOST_DURATION,
+    POWERUP_SHIELD, POWERUP_SLOW, POWERUP_BOOST,
+)
+
+# Actions
+NOOP = 0
+LEFT = 1
+RIGHT = 2
+
+PLAYER_START_X = WIDTH // 2 - PLAYER_WIDTH // 2
+PLAYER_Y = HEIGHT - PLAYER_HEIGHT - 20
+PLAYER_SPEED = 5 * REFERENCE_FPS
+PLAYER_LIVES = 3
+POWERUP_SPEED = 2 * REFERENCE_FPS
+MAX_POWERUPS = 2
+
+# Reward is the score gained, minus this for every life lost
+LIFE_PENALTY = 50
+# Episodes are cut off after ten simulated minutes
+MAX_EPISODE_SECONDS = 600
+
+# ===========================
+# Batched environment
+# ===========================
+class VecRaceEnv:
+    # num_envs independent games stepped together as NumPy arrays, with a
+    # Gymnasium-style vector API: reset() -> (obs, info) and
+    # step(actions) -> (obs, reward, terminated, truncated, info). Finished
+    # games are reset automatically inside step().
+    #
+    # Same rules as GameState (road between ROAD_LEFT and ROAD_RIGHT, spawn
+    # retries, enemy cap, shield/slow/boost, lives, level-ups and winning),
+    # but games draw from one NumPy generator, so individual games are not
+    # bit-identical to GameState with the same seed. Cosmetic particles and
+    # road lines are left out.
+
+    num_actions = 3
+
+    def __init__(self, num_envs, seed=None, tick_rate=TICK_RATE, difficulty=None,
+                 pixels=False, pixel_scale=8, life_penalty=LIFE_PENALTY):
+        if np is None:
+            raise RuntimeError("VecRaceEnv needs NumPy: pip install numpy")
+
+        for name in DIFFICULTY_FIELDS:
+            setattr(self, name, getattr(GameState, name))
+        for name, value in (difficulty or {}).items():
+            if name not in DIFFICULTY_FIELDS:
+                raise ValueError(f"Unknown difficulty setting: {name}")
+            setattr(self, name, value)
+
+        self.num_envs = num_envs
+        self.dt = 1.0 / tick_rate
+        self.frame_scale = self.dt * REFERENCE_FPS
+        self.max_steps = MAX_EPISODE_SECONDS * tick_rate
+        self.life_penalty = life_penalty
+        self.pixels = pixels
+        self.pixel_scale = pixel_scale
+        self.rng = np.random.default_rng(seed)
+
+        # One slot per enemy that can be alive at the highest level
+        self.max_enemies = self.enemy_cap + self.max_level
+        self.observation_size = 6 + 4 * self.max_enemies + 6 * MAX_POWERUPS
+
+        n, e = num_envs, self.max_enemies
+        self.player_x = np.zeros(n)
+        self.lives = np.zeros(n, np.int64)
+        self.score = np.zeros(n, np.int64)
+        self.level = np.zeros(n, np.int64)
+        self.steps = np.zeros(n, np.int64)
+        # A power-up is active while its timer is above zero
+        self.shield_timer = np.zeros(n)
+        self.slow_timer = np.zeros(n)
+        self.boost_timer = np.zeros(n)
+
+        self.enemy_x = np.zeros((n, e))
+        self.enemy_y = np.zeros((n, e))
+        self.enemy_speed = np.zeros((n, e))
+        self.enemy_alive = np.zeros((n, e), bool)
+
+        self.powerup_x = np.zeros((n, MAX_POWERUPS))
+        self.powerup_y = np.zeros((n, MAX_POWERUPS))
+        self.powerup_type = np.zeros((n, MAX_POWERUPS), np.int64)
+        self.powerup_alive = np.zeros((n, MAX_POWERUPS), bool)
+
+        if pixels:
+            rows = HEIGHT // pixel_scale
+            cols = WIDTH // pixel_scale
+            self.pixel_rows = np.arange(rows) * pixel_scale
+            self.pixel_cols = np.arange(cols) * pixel_scale
+            # Road in black, the area beyond the side lines in gray
+            self.pixel_background = np.zeros((rows, cols), np.uint8)
+            off_road = (self.pixel_cols < ROAD_LEFT) | (self.pixel_cols >= ROAD_RIGHT)
+            self.pixel_background[:, off_road] = 64
+
+    # ---------------------------
+    # Reset
+    # ---------------------------
+    def reset(self, seed=None):
+        if seed is not None:
+            self.rng = np.random.default_rng(seed)
+        self.reset_envs(np.arange(self.num_envs))
+        return self.observe(), {}
+
+    def reset_envs(self, idx):
+        self.player_x[idx] = PLAYER_START_X
+        self.lives[idx] = PLAYER_LIVES
+        self.score[idx] = 0
+        self.level[idx] = 1
+        self.steps[idx] = 0
+        self.shield_timer[idx] = 0
+        self.slow_timer[idx] = 0
+        self.boost_timer[idx] = 0
+        self.enemy_alive[idx] = False
+        self.powerup_alive[idx] = False
+        for i in range(3):
+            self.add_enemies(idx)
+
+    # ---------------------------
+    # Spawning
+    # ---------------------------
+    def find_spawn_spots(self, idx, w, h, top, bottom):
+        # SPAWN_ATTEMPTS random spots per game; the first one that overlaps
+        # no car or power-up is used. Returns (found, x, y).
+        shape = (len(idx), SPAWN_ATTEMPTS)
+        x = self.rng.integers(ROAD_LEFT, ROAD_RIGHT - w, shape, endpoint=True)
+        y = self.rng.integers(top, bottom, shape, endpoint=True)
+        x3, y3 = x[:, :, None], y[:, :, None]
+
+        ex = np.trunc(self.enemy_x[idx])[:, None, :]
+        ey = np.trunc(self.enemy_y[idx])[:, None, :]
+        blocked = ((x3 < ex + ENEMY_WIDTH) & (x3 + w > ex) & (y3 < ey + ENEMY_HEIGHT) & (y3 + h > ey)
+                   & self.enemy_alive[idx][:, None, :]).any(axis=2)
+        px = np.trunc(self.powerup_x[idx])[:, None, :]
+        py = np.trunc(self.powerup_y[idx])[:, None, :]
+        blocked |= ((x3 < px + POWERUP_SIZE) & (x3 + w > px) & (y3 < py + POWERUP_SIZE) & (y3 + h > py)
+                    & self.powerup_alive[idx][:, None, :]).any(axis=2)
+
+        free = ~blocked
+        first = free.argmax(axis=1)
+        rows = np.arange(len(idx))
+        return free.any(axis=1), x[rows, first], y[rows, first]
+
+    def add_enemies(self, idx):
+        # One enemy for every game in idx that still has a free slot and spot
+        idx = idx[self.enemy_alive[idx].sum(axis=1) < self.max_enemies]
+        found, x, y = self.find_spawn_spots(idx, ENEMY_WIDTH, ENEMY_HEIGHT, -600, -ENEMY_HEIGHT)
+        idx, x, y = idx[found], x[found], y[found]
+        slot = self.enemy_alive[idx].argmin(axis=1)
+        speed = self.rng.integers(self.enemy_speed_min, self.enemy_speed_max, len(idx), endpoint=True)
+        self.enemy_x[idx, slot] = x
+        self.enemy_y[idx, slot] = y
+        self.enemy_speed[idx, slot] = (speed + self.level[idx]) * REFERENCE_FPS
+        self.enemy_alive[idx, slot] = True
+
+    def add_powerups(self, idx):
+        found, x, y = self.find_spawn_spots(idx, POWERUP_SIZE, POWERUP_SIZE, -400, -POWERUP_SIZE)
+        idx, x, y = idx[found], x[found], y[found]
+        slot = self.powerup_alive[idx].argmin(axis=1)
+        self.powerup_x[idx, slot] = x
+        self.powerup_y[idx, slot] = y
+        self.powerup_type[idx, slot] = self.rng.integers(0, 3, len(idx))
+        self.powerup_alive[idx, slot] = True
+
+    # ---------------------------
+    # Step
+    # ---------------------------
+    def step(self, actions):
+        n, dt = self.num_envs, self.dt
+        actions = np.asarray(actions)
+        score_before = self.score.copy()
+
+        # Player
+        speed = np.where(self.boost_timer > 0, PLAYER_SPEED * 1.5, PLAYER_SPEED)
+        left = (actions == LEFT) & (self.player_x > ROAD_LEFT)
+        right = (actions == RIGHT) & (self.player_x < ROAD_RIGHT - PLAYER_WIDTH)
+        self.player_x += (right.astype(np.int8) - left) * speed * dt
+
+        # Spawns, same chances as GameState.spawn_enemy / spawn_powerup
+        count = self.enemy_alive.sum(axis=1)
+        chance = (self.spawn_chance + self.level * self.spawn_chance_per_level) * self.frame_scale
+        spawn = (count < self.enemy_cap + self.level) & (self.rng.random(n) < chance)
+        if spawn.any():
+            self.add_enemies(np.flatnonzero(spawn))
+
+        spawn = (self.powerup_alive.sum(axis=1) < MAX_POWERUPS) & (self.rng.random(n) < 0.005 * self.frame_scale)
+        if spawn.any():
+            self.add_powerups(np.flatnonzero(spawn))
+
+        # Enemies move (half speed while slowed); every car that leaves the
+        # screen scores, one at a time so level-ups match GameState
+        enemy_speed = np.where(self.slow_timer > 0, 0.5, 1.0)[:, None] * self.enemy_speed
+        self.enemy_y += enemy_speed * dt
+        passed = self.enemy_alive & (self.enemy_y > HEIGHT)
+        self.enemy_alive &= ~passed
+        passed_count = passed.sum(axis=1)
+        won = np.zeros(n, bool)
+        for i in range(1, int(passed_count.max(initial=0)) + 1):
+            scoring = passed_count >= i
+            self.score[scoring] += 10
+            level_up = scoring & (self.score % self.level_up_score == 0) & (self.level < self.max_level)
+            self.level[level_up] += 1
+            won |= scoring & (self.level >= self.max_level) & (self.score >= self.max_level * self.level_up_score)
+
+        self.powerup_y += POWERUP_SPEED * dt
+        self.powerup_alive &= self.powerup_y <= HEIGHT
+
+        for timer in (self.shield_timer, self.slow_timer, self.boost_timer):
+            active = timer > 0
+            timer[active] -= dt
+
+        # Collisions on truncated coordinates, like pygame.Rect
+        px = np.trunc(self.player_x)[:, None]
+        ex, ey = np.trunc(self.enemy_x), np.trunc(self.enemy_y)
+        hit = (self.enemy_alive & (px < ex + ENEMY_WIDTH) & (px + PLAYER_WIDTH > ex)
+               & (PLAYER_Y < ey + ENEMY_HEIGHT) & (PLAYER_Y + PLAYER_HEIGHT > ey))
+        self.enemy_alive &= ~hit
+        hits = hit.sum(axis=1)
+        shielded = self.shield_timer > 0
+        self.score += np.where(shielded, 20 * hits, 0)
+        lost = np.where(shielded, 0, hits)
+        self.lives -= lost
+
+        ux, uy = np.trunc(self.powerup_x), np.trunc(self.powerup_y)
+        got = (self.powerup_alive & (px < ux + POWERUP_SIZE) & (px + PLAYER_WIDTH > ux)
+               & (PLAYER_Y < uy + POWERUP_SIZE) & (PLAYER_Y + PLAYER_HEIGHT > uy))
+        self.powerup_alive &= ~got
+        for powerup_type, timer, duration in ((POWERUP_SHIELD, self.shield_timer, SHIELD_DURATION),
+                                              (POWERUP_SLOW, self.slow_timer, SLOW_DURATION),
+                                              (POWERUP_BOOST, self.boost_timer, BOOST_DURATION)):
+            timer[(got & (self.powerup_type == powerup_type)).any(axis=1)] = duration
+
+        self.steps += 1
+        crashed = self.lives <= 0
+        # A crash in the same tick as the winning pass still ends the game
+        won &= ~crashed
+        terminated = crashed | won
+        truncated = ~terminated & (self.steps >= self.max_steps)
+        reward = (self.score - score_before - self.life_penalty * lost).astype(np.float32)
+
+        info = {"score": self.score.copy(), "level": self.level.copy(),
+                "lives": self.lives.copy(), "won": won}
+        done = terminated | truncated
+        if done.any():
+            self.reset_envs(np.flatnonzero(done))
+
+        return self.observe(), reward, terminated, truncated, info
+
+    # ---------------------------
+    # Observations
+    # ---------------------------
+    def observe(self):
+        # Per game: player state, then enemies nearest to the player first,
+        # then power-ups. Empty slots are all zero.
+        player = np.stack([
+            (self.player_x - ROAD_LEFT) / (ROAD_RIGHT - PLAYER_WIDTH - ROAD_LEFT),
+            self.lives / PLAYER_LIVES,
+            self.level / self.max_level,
+            self.shield_timer / SHIELD_DURATION,
+            self.slow_timer / SLOW_DURATION,
+            self.boost_timer / BOOST_DURATION,
+        ], axis=1)
+
+        order = np.argsort(np.where(self.enemy_alive, -self.enemy_y, np.inf), axis=1)
+        alive = np.take_along_axis(self.enemy_alive, order, axis=1)
+        max_speed = (self.enemy_speed_max + self.max_level) * REFERENCE_FPS
+        enemies = np.stack([
+            (np.take_along_axis(self.enemy_x, order, axis=1) - self.player_x[:, None]) / WIDTH,
+            (PLAYER_Y - np.take_along_axis(self.enemy_y, order, axis=1)) / HEIGHT,
+            np.take_along_axis(self.enemy_speed, order, axis=1) / max_speed,
+            np.ones_like(alive, float),
+        ], axis=2) * alive[:, :, None]
+
+        powerup_kind = self.powerup_type[:, :, None] == np.arange(3)
+        powerups = np.concatenate([
+            ((self.powerup_x - self.player_x[:, None]) / WIDTH)[:, :, None],
+            ((PLAYER_Y - self.powerup_y) / HEIGHT)[:, :, None],
+            powerup_kind,
+            np.ones((self.num_envs, MAX_POWERUPS, 1)),
+        ], axis=2) * self.powerup_alive[:, :, None]
+
+        vector = np.concatenate([player, enemies.reshape(self.num_envs, -1),
+                                 powerups.reshape(self.num_envs, -1)], axis=1).astype(np.float32)
+        if not self.pixels:
+            return vector
+        return {"vector": vector, "pixels": self.render_pixels()}
+
+    def render_pixels(self):
+        # Top-down grayscale frames of HEIGHT / pixel_scale by WIDTH /
+        # pixel_scale, sampling each cell's top-left pixel: enemies 255,
+        # power-ups 192, player 128
+        frames = np.repeat(self.pixel_background[None], self.num_envs, axis=0)
+        rows, cols = self.pixel_rows, self.pixel_cols
+
+        def cover(x, y, w, h, alive):
+            # Cells covered by any of the rects, as one batched matrix
+            # product of per-rect row and column masks
+            x, y = np.trunc(x)[:, :, None], np.trunc(y)[:, :, None]
+            in_rows = ((rows >= y) & (rows < y + h) & alive[:, :, None]).astype(np.float32)
+            in_cols = ((cols >= x) & (cols < x + w)).astype(np.float32)
+            return np.matmul(in_rows.transpose(0, 2, 1), in_cols) > 0
+
+        player_x = self.player_x[:, None]
+        layers = (
+            (cover(self.powerup_x, self.powerup_y, POWERUP_SIZE, POWERUP_SIZE, self.powerup_alive), 192),
+            (cover(self.enemy_x, self.enemy_y, ENEMY_WIDTH, ENEMY_HEIGHT, self.enemy_alive), 255),
+            (cover(player_x, np.full_like(player_x, PLAYER_Y), PLAYER_WIDTH, PLAYER_HEIGHT,
+                   np.ones_like(player_x, bool)), 128),
+        )
+        for covered, value in layers:
+            np.putmask(frames, covered, value)
+        return frames
+
+# ===========================
+# Throughput check
+# ===========================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure VecRaceEnv steps per second")
+    parser.add_argument("--envs", type=int, default=1024)
+    parser.add_argument("--steps", type=int, default=1000)
+    parser.add_argument("--pixels", action="store_true")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    env = VecRaceEnv(args.envs, seed=args.seed, pixels=args.pixels)
+    env.reset()
+    rng = np.random.default_rng(args.seed)
+    episodes = 0
+    start = time.perf_counter()
+    for _ in range(args.steps):
+        obs, reward, terminated, truncated, info = env.step(rng.integers(0, env.num_actions, args.envs))
+        episodes += int(np.count_nonzero(terminated | truncated))
+    elapsed = time.perf_counter() - start
+
+    total = args.envs * args.steps
+    print(f"{total} env steps in {elapsed:.2f} s: {total / elapsed:,.0f} steps/s, {episodes} episodes finished")
+
+if __name__ == "__main__":
+    main()